@@ -1,45 +1,91 @@
 import cProfile
 import io
 import pstats
+import queue
 import sys
 import threading
 import traceback
 import time
+from concurrent.futures import Future
 
 from PythonClientAPI.Communication.Signals import Signals
 from PythonClientAPI.Configurator import Constants
 from PythonClientAPI.Game.GameState import PlayerTurnActionInfo
 from PythonClientAPI.Game.Enums import MoveType
+from PythonClientAPI.Game.TurnToken import TurnCancelled
 
 
 class AIHandlerThread(threading.Thread):
-    def __init__(self, group=None, target=None, name=None, args=(), kwargs={}, daemon=None):
-        threading.Thread.__init__(self, group=group, target=target, daemon=daemon, args=args, kwargs=kwargs)
-        self.player_move = Signals.NO_RESPONSE.name
+    """
+    Long-lived thread that runs the player AI, one turn at a time.
+
+    Turns are handed over with submit, which returns a Future that completes with the turn's move, so
+    the protocol thread wakes up as soon as the move is ready instead of polling for it. A turn whose token
+    is cancelled stops at the next World query it makes, and is skipped if it has not started yet. A turn
+    that keeps running without querying the World can not be stopped, and the protocol submits no further
+    turns until it is over, so do_move is never run twice at once on the same PlayerAI.
+    """
+    def __init__(self, player_ai):
+        threading.Thread.__init__(self, name="AIHandlerThread", daemon=True)
+        self.player_ai = player_ai
+        self._turns = queue.Queue()
+
+    def submit(self, decoded_game_data, token):
+        """
+        :param decoded_game_data: GameState of the turn to play
+        :param TurnToken token: token of the turn, already set on the world of decoded_game_data
+        :return: future whose result is the PlayerTurnActionInfo of the turn, or Signals.NO_RESPONSE.name if
+            do_move raised or the turn was cancelled
+        :rtype: concurrent.futures.Future
+        """
+        future = Future()
+        self._turns.put((decoded_game_data, token, future))
+        return future
+
+    def stop(self):
+        """
+        Lets the thread exit once the turn it is playing, if any, is over.
+        """
+        self._turns.put(None)
 
     def run(self):
-        player_ai = self._kwargs['player_ai']
-        decoded_game_data = self._kwargs['decoded_game_data']
-        player_move_event = self._kwargs['player_move_event']
-        friendly_units = decoded_game_data.player_uuid_to_player_type_map[Constants.LOCAL_PLAYER_UUID].friendly_units
-        enemy_units = decoded_game_data.player_uuid_to_player_type_map[decoded_game_data.enemy_uuid].friendly_units
-        friendly_units.sort(key=lambda unit: unit.health)
-        enemy_units.sort(key=lambda unit: unit.health)
-        try:
-            start_time = time.time()
-            player_ai.do_move(decoded_game_data.world, friendly_units, enemy_units)
-
-            self.player_move = PlayerTurnActionInfo({unit.uuid: unit for unit in friendly_units if unit.get_next_move_type() == MoveType.MOVE})
-            end_time = time.time()
-            print("[TIME] " + str(round((end_time - start_time) * 1000)) + " ms")
-
-            player_move_event.set()
-        except:
-            print("An exception occurred in calling do_move: \n", file=sys.stderr)
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            traceback.print_exception(exc_type, exc_value, exc_traceback,
-                                      file=sys.stderr)
-            player_move_event.set()
-
-    def get_move(self):
-        return self.player_move
+        while True:
+            turn = self._turns.get()
+            if turn is None: return
+            decoded_game_data, token, future = turn
+            if token.cancelled:
+                future.set_result(Signals.NO_RESPONSE.name)
+            else:
+                future.set_result(self.get_move(decoded_game_data))
+
+    def get_move(self, decoded_game_data):
+        return play_turn(self.player_ai, decoded_game_data)
+
+
+def play_turn(player_ai, decoded_game_data):
+    """
+    Runs do_move of player_ai on a decoded turn.
+
+    :return: PlayerTurnActionInfo of the units that move, or Signals.NO_RESPONSE.name if do_move raised
+    """
+    friendly_units = decoded_game_data.player_uuid_to_player_type_map[Constants.LOCAL_PLAYER_UUID].friendly_units
+    enemy_units = decoded_game_data.player_uuid_to_player_type_map[decoded_game_data.enemy_uuid].friendly_units
+    friendly_units.sort(key=lambda unit: unit.health)
+    # Enemy units are decoded lazily and already sorted by health, sorting them here would create them all
+    try:
+        start_time = time.time()
+        player_ai.do_move(decoded_game_data.world, friendly_units, enemy_units)
+
+        player_move = PlayerTurnActionInfo({unit.uuid: unit for unit in friendly_units if unit.get_next_move_type() == MoveType.MOVE})
+        end_time = time.time()
+        print("[TIME] " + str(round((end_time - start_time) * 1000)) + " ms")
+        return player_move
+    except TurnCancelled as cancelled:
+        print("{0}: do_move ran past the maximum allowed response time and was stopped".format(cancelled), file=sys.stderr)
+        return Signals.NO_RESPONSE.name
+    except:
+        print("An exception occurred in calling do_move: \n", file=sys.stderr)
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        traceback.print_exception(exc_type, exc_value, exc_traceback,
+                                  file=sys.stderr)
+        return Signals.NO_RESPONSE.name
@@ -2,27 +2,40 @@ import cProfile
 import io
 import json
 import pstats
+import sys
 import time
+import traceback
+from concurrent import futures
 
 import PythonClientAPI.Communication.CommunicatorConstants as cc
 from PythonClientAPI.Communication.ClientChannelHandler import *
 
 import PythonClientAPI.Game.JSON as JSON
 from PythonClientAPI.Communication.AIHandlerThread import *
+from PythonClientAPI.Communication.FallbackPlan import FALLBACK_RESERVE_FRACTION, plan_fallback_moves
 from PythonClientAPI.Communication.Flag import Flag
-from PythonClientAPI.Game.Enums import Direction
+from PythonClientAPI.Game.TurnToken import TurnToken
 
 
 class ClientHandlerProtocol():
-    def __init__(self, player_ai, port_number, max_response_time, uuidString):
+    def __init__(self, player_ai, port_number, max_response_time, uuidString, ai_process_executor=None):
+        """
+        :param player_ai: PlayerAI to run on a thread of this process, or None when ai_process_executor is given
+        :param AIProcessExecutor ai_process_executor: runs the PlayerAI in a worker process instead
+        """
         self.player_ai = player_ai
         self.client_uuid = uuidString
         self.game_is_ongoing = False
         self.ai_responded = True
+        self.ai_process_executor = ai_process_executor
+        self.ai_handler_thread = AIHandlerThread(player_ai) if ai_process_executor is None else None
+        self.ai_response = None
+        self.turn_token = None
         cc.MAXIMUM_ALLOWED_RESPONSE_TIME = max_response_time
         cc.PORT_NUMBER = port_number
         self.turn = 0
         self.tiles = []
+        self.world = None
 
     def start_connection(self):
         self.client_channel_handler = ClientChannelHandler()
@@ -42,24 +55,29 @@ class ClientHandlerProtocol():
 
     def start_communications(self):
         self.start_connection()
+        self.get_ai_executor().start()
         self.game_is_ongoing = True
         self.communication_protocol()
 
     def end_communications(self):
         self.client_channel_handler.close_connection()
+        self.get_ai_executor().stop()
         self.game_is_ongoing = False
 
     def relay_message_and_respond_to(self, message_from_server):
         if message_from_server == Signals.BEGIN.name:
             self.start_game()
         elif message_from_server == Signals.MOVE.name:
-            self.next_move_from_client()
+            self.next_move_from_client(self.client_channel_handler.last_message_time)
         elif message_from_server == Signals.END.name:
             self.end_communications()
         elif message_from_server == Signals.GET_READY.name:
             game_initial_state = self.client_channel_handler.receive_message()
-            self.tiles = JSON.parse_tile_data(game_initial_state)
-            Direction.ORDERED_DIRECTIONS = JSON.parse_ordered_directions(game_initial_state, self.client_uuid)
+            if self.ai_process_executor is not None:
+                self.ai_process_executor.set_initial_state(game_initial_state, self.client_uuid)
+            # With a worker process the world here is only used to plan fallback moves
+            self.tiles = JSON.parse_initial_state(game_initial_state, self.client_uuid)
+            self.world = JSON.as_initial_world(self.tiles)
             self.client_channel_handler.send_message(Signals.READY.name)
         else:
             self.end_communications()
@@ -68,12 +86,21 @@ class ClientHandlerProtocol():
     def start_game(self):
         self.client_channel_handler.send_message(self.client_uuid)
 
-    def next_move_from_client(self):
+    def get_ai_executor(self):
+        return self.ai_process_executor if self.ai_process_executor is not None else self.ai_handler_thread
+
+    def next_move_from_client(self, turn_start):
 
         game_data_from_server = self.client_channel_handler.receive_message()
-        decoded_game_data = JSON.parse_game_state(game_data_from_server, self.tiles)
+        if self.ai_process_executor is not None:
+            # The worker process decodes the state itself and answers with JSON
+            self.client_channel_handler.send_message(self.get_isolated_ai_response(game_data_from_server, turn_start))
+            if not self.ai_responded:
+                # do_move can not be interrupted inside the worker, so once the response is out the worker is replaced
+                self.ai_process_executor.restart()
+            return
 
-        client_move = self.get_timed_ai_response(decoded_game_data)
+        client_move = self.get_timed_ai_response(game_data_from_server, turn_start)
 
         if isinstance(client_move, str):
             client_move_json = client_move
@@ -83,29 +110,70 @@ class ClientHandlerProtocol():
         self.client_channel_handler.send_message(client_move_json)
 
 
-    def get_timed_ai_response(self, game_data):
+    def get_timed_ai_response(self, game_state, turn_start=None):
+        """
+        :param str game_state: JSON sent by the server after MOVE
+        :param float turn_start: time.time() at which the MOVE message arrived, from which the response time is measured
+        :return: the moves of the AI or the fallback moves, or Signals.NO_RESPONSE.name
+        """
+        start_time = turn_start if turn_start is not None else time.time()
+        self.turn += 1
+        if self.ai_response is not None and not self.ai_response.done():
+            # A cancelled turn that does not query the World can not be stopped. The PlayerAI is never given a
+            # second turn while it is still busy with one, so the fallback moves are sent until it is done.
+            print("The AI is still playing turn {0}, sending fallback moves for turn {1}".format(self.turn_token.turn, self.turn))
+            self.ai_responded = False
+            fallback = self.try_plan_fallback(lambda: plan_fallback_moves(JSON.parse_game_state(game_state, self.tiles)))
+            return fallback if fallback is not None else Signals.NO_RESPONSE.name
+
+        game_data = JSON.parse_game_state(game_state, self.tiles, self.world)
+        self.turn_token = TurnToken(self.turn)
+        game_data.world.set_turn_token(self.turn_token)
+        game_data.world.set_turn_start(start_time)
+        self.ai_response = self.ai_handler_thread.submit(game_data, self.turn_token)
+
+        # The AI is still using the World of game_data, so the fallback is planned on a World of its own
+        player_move, fallback = self.time_response_with_fallback(
+            self.ai_response, start_time,
+            lambda: plan_fallback_moves(game_data, JSON.parse_game_state(game_state, self.tiles).world))
+        if player_move is not None and is_valid_response_time(start_time, time.time()):
+            self.ai_responded = True
+            return player_move
+        else:
+            # The late turn stops at its next World query, and its moves are never sent
+            self.turn_token.cancel()
+            self.print_timeout(start_time)
+            self.ai_responded = False
 
-        if self.ai_responded:
-            self.player_move_event = threading.Event()
-            self.ai_handler_thread = AIHandlerThread(kwargs={'player_ai': self.player_ai,
-                                                             'decoded_game_data': game_data,
-                                                             'player_move_event': self.player_move_event})
-            self.ai_handler_thread.start()
+            return fallback if fallback is not None else Signals.NO_RESPONSE.name
 
-        start_time = time.time()
-        self.time_response(self.player_move_event, start_time + (cc.MAXIMUM_ALLOWED_RESPONSE_TIME / 1000))
+    def get_isolated_ai_response(self, game_state, turn_start=None):
+        """
+        :param float turn_start: time.time() at which the MOVE message arrived, from which the response time is measured
+        """
+        start_time = turn_start if turn_start is not None else time.time()
         self.turn += 1
-        if self.player_move_event.is_set() and is_valid_response_time(start_time, time.time()):
+        self.ai_response = self.ai_process_executor.submit(self.turn, game_state, start_time)
+
+        # The fallback is planned on the world of this process, which is only brought up to date on late turns
+        player_move, fallback = self.time_response_with_fallback(
+            self.ai_response, start_time,
+            lambda: plan_fallback_moves(JSON.parse_game_state(game_state, self.tiles, self.world)))
+        if player_move is not None and is_valid_response_time(start_time, time.time()):
             self.ai_responded = True
-            return self.ai_handler_thread.get_move()
+            return player_move
         else:
-            print("The AI timed out with a maximum allowed response time of: {0} ms".format(
-                cc.MAXIMUM_ALLOWED_RESPONSE_TIME))
-            print("time ", (time.time() - start_time) * 1000)
-            print("turn ", self.turn)
+            # The worker is replaced by next_move_from_client once this response has been sent
+            self.print_timeout(start_time)
             self.ai_responded = False
 
-            return Signals.NO_RESPONSE.name
+            return json.dumps(fallback, cls=JSON.FFEncoder) if fallback is not None else Signals.NO_RESPONSE.name
+
+    def print_timeout(self, start_time):
+        print("The AI timed out with a maximum allowed response time of: {0} ms".format(
+            cc.MAXIMUM_ALLOWED_RESPONSE_TIME))
+        print("time ", (time.time() - start_time) * 1000)
+        print("turn ", self.turn)
 
     def pprofile(self, pr):
         pr.disable()
@@ -116,15 +184,37 @@ class ClientHandlerProtocol():
         print(s.getvalue(), file=sys.stderr, flush=True)
         print("=x=" * 33, file=sys.stderr, flush=True)
 
-    def time_response(self, player_move_event, end_time):
-
-        # --------------------------
-        # while not player_move_event.is_set() and is_valid_response_time(start_time, time.time()):
-        #     time.sleep(0.01)
-        while not player_move_event.is_set() and time.time() < end_time:
-            player_move_event.wait(0.005)
-
-        # --------------------------e
+    def time_response_with_fallback(self, ai_response, start_time, plan_fallback):
+        """
+        Waits for the AI like time_response. If the AI is not done when only FALLBACK_RESERVE_FRACTION of the
+        response time is left, plans the fallback moves while it keeps running. Turns on which the AI is done
+        in time never plan a fallback.
+
+        :return: the move of the AI, or None if it timed out, and the fallback moves, or None if none were planned
+        """
+        maximum_response_time = cc.MAXIMUM_ALLOWED_RESPONSE_TIME / 1000
+        end_time = start_time + maximum_response_time
+        player_move = self.time_response(ai_response, end_time - FALLBACK_RESERVE_FRACTION * maximum_response_time)
+        if player_move is not None: return player_move, None
+
+        fallback = self.try_plan_fallback(plan_fallback)
+        return self.time_response(ai_response, end_time), fallback
+
+    def try_plan_fallback(self, plan_fallback):
+        try:
+            return plan_fallback()
+        except:
+            print("An exception occurred while planning the fallback moves: \n", file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+            return None
+
+    def time_response(self, ai_response, end_time):
+        # Blocks until the AI thread or process completes the future or end_time is reached, whichever comes first.
+        # Each future is created for a single turn, so a late result can only ever complete its own turn's future.
+        try:
+            return ai_response.result(max(0, end_time - time.time()))
+        except futures.TimeoutError:
+            return None
 
 
 def is_valid_response_time(start_time, end_time):
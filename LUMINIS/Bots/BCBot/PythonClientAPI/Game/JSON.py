@@ -2,8 +2,10 @@ import json
 import PythonClientAPI.Configurator.Constants as constants
 import PythonClientAPI.Communication.CommunicatorConstants as comm_constants
 from PythonClientAPI.Game.Entities import *
-from PythonClientAPI.Game.Enums import TileType, Team, MoveResult
+from PythonClientAPI.Game.Enums import TileType, Team, MoveResult, Direction
 from PythonClientAPI.Game.GameState import *
+from PythonClientAPI.Game.PointUtils import intern_point, set_map_dimensions
+from PythonClientAPI.Game.UnitView import UnitView
 from PythonClientAPI.Game.World import World
 from enum import Enum
 
@@ -13,10 +15,23 @@ def parse_config(jsn, player_index):
     comm_constants.PORT_NUMBER = int(dct["portNumber"])
     comm_constants.MAXIMUM_ALLOWED_RESPONSE_TIME = int(dct["maxResponseTime"])
 
-def parse_game_state(jsn, tiles):
+def parse_game_state(jsn, tiles, world=None):
     dct = json.loads(jsn)
+    if world is not None:
+        return update_game_state(dct, world)
     return as_game_state(dct, tiles)
 
+def parse_initial_state(game_initial_state, uuid):
+    """
+    Sets up the map dimensions and the ordered directions of player uuid for the match that starts.
+
+    :return: tiles of the map
+    """
+    tiles = parse_tile_data(game_initial_state)
+    set_map_dimensions(len(tiles), len(tiles[0]))
+    Direction.ORDERED_DIRECTIONS = parse_ordered_directions(game_initial_state, uuid)
+    return tiles
+
 def parse_tile_data(game_starting_state):
     dct = json.loads(game_starting_state)
     return as_tiles(dct["tiles"])
@@ -29,28 +44,36 @@ def as_direction_list(directions):
     return [Direction[direction] for direction in directions]
 
 def as_game_state(dct, tiles):
+    return update_game_state(dct, as_initial_world(tiles))
+
+def as_initial_world(tiles):
+    return World(tiles, [], [], {Team.FRIENDLY: [], Team.ENEMY: []}, {Team.FRIENDLY: [], Team.ENEMY: []})
+
+def update_game_state(dct, world):
     player_uuid_to_player_type_map = {}
-    team_to_tiles_map = {}
+    team_to_tile_states = {}
     team_to_nests_map = {}
+    team_to_units = {}
 
     for uuid in dct['playerUUIDToPlayerTypeMap'].keys():
+        player_dct = dct['playerUUIDToPlayerTypeMap'][uuid]
         if uuid == constants.LOCAL_PLAYER_UUID:
-            player_state = as_friendly_player_state(dct['playerUUIDToPlayerTypeMap'][uuid])
-            team_to_tiles_map[Team.FRIENDLY] = player_state.friendly_tile_positions
-            team_to_nests_map[Team.FRIENDLY] = player_state.friendly_nest_positions
+            team = Team.FRIENDLY
+            units = as_friendly_unit_list(player_dct['friendlyUnits'])
         else:
-            player_state = as_enemy_player_state(dct['playerUUIDToPlayerTypeMap'][uuid])
-            team_to_tiles_map[Team.ENEMY] = player_state.friendly_tile_positions
-            team_to_nests_map[Team.ENEMY] = player_state.friendly_nest_positions
+            team = Team.ENEMY
+            units = as_enemy_unit_view(player_dct['friendlyUnits'])
             enemy_uuid = uuid
+        team_to_units[team] = units
+        team_to_tile_states[team] = player_dct['friendlyTilePositions']
+        team_to_nests_map[team] = as_point_list(player_dct['friendlyNestPositions'])
 
-        player_uuid_to_player_type_map[uuid] = player_state
+    world.update(team_to_units[Team.FRIENDLY], team_to_units[Team.ENEMY], team_to_tile_states, team_to_nests_map)
 
-    player_index_to_uuid_map = {player_index: dct['playerIndexToUUIDMap'][player_index] for player_index in dct['playerIndexToUUIDMap'].keys()}
+    player_uuid_to_player_type_map[constants.LOCAL_PLAYER_UUID] = PlayerState(team_to_units[Team.FRIENDLY], world.get_friendly_tiles(), team_to_nests_map[Team.FRIENDLY])
+    player_uuid_to_player_type_map[enemy_uuid] = PlayerState(team_to_units[Team.ENEMY], world.get_enemy_tiles(), team_to_nests_map[Team.ENEMY])
 
-    world = World(tiles, player_uuid_to_player_type_map[constants.LOCAL_PLAYER_UUID].friendly_units,
-                  player_uuid_to_player_type_map[enemy_uuid].friendly_units,
-                  team_to_tiles_map, team_to_nests_map)
+    player_index_to_uuid_map = {player_index: dct['playerIndexToUUIDMap'][player_index] for player_index in dct['playerIndexToUUIDMap'].keys()}
 
     return GameState(world, player_uuid_to_player_type_map, player_index_to_uuid_map, enemy_uuid)
 
@@ -67,6 +90,10 @@ def as_enemy_player_state(dct):
 def as_enemy_unit_list(lst):
     return [as_enemy_unit(unit) for unit in lst]
 
+def as_enemy_unit_view(lst):
+    # Ordered by health up front, since the AI handler hands units to do_move sorted by health
+    return UnitView(sorted(lst, key=lambda unit: int(unit['LF'])), as_enemy_unit, lambda unit: as_point_from_dct(unit['position']))
+
 def as_friendly_unit_list(lst):
     return [as_friendly_unit(unit) for unit in lst]
 
@@ -91,10 +118,10 @@ def as_tiles(lst):
     return [[TileType[tile] for tile in column] for column in lst]
 
 def as_point_from_dct(dct):
-    return (dct['x'], dct['y'])
+    return intern_point(dct['x'], dct['y'])
 
 def as_point_from_array(arr):
-    return (arr[0], arr[1])
+    return intern_point(arr[0], arr[1])
 
 class FFEncoder(json.JSONEncoder):
     def default(self, obj):
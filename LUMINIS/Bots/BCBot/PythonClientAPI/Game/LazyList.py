@@ -0,0 +1,90 @@
+class LazyList(list):
+    """
+    List whose items are created from keys the first time they are accessed, and then kept so that the same
+    key always yields the same object.
+
+    len, indexing, slicing, iteration and in only create the items they return. Any other list operation,
+    such as sort, append or remove, creates every item first, after which this is an ordinary list.
+    """
+    def __init__(self, keys, create_item, get_position):
+        """
+        :param list keys: one key per item, e.g. a decoded JSON entry or a cell id
+        :param function create_item: takes a key and returns the item
+        :param function get_position: takes a key and returns the (x,y) position of its item
+        """
+        list.__init__(self, [None] * len(keys))
+        self._keys = keys
+        self._create_item = create_item
+        self._get_position = get_position
+
+    def _get_item(self, index):
+        item = list.__getitem__(self, index)
+        if item is None:
+            item = self._create_item(self._keys[index])
+            list.__setitem__(self, index, item)
+        return item
+
+    def _create_all(self):
+        if self._keys is not None:
+            for index in range(len(self)):
+                self._get_item(index)
+            self._keys = None
+
+    def __getitem__(self, index):
+        if self._keys is None:
+            return list.__getitem__(self, index)
+        if isinstance(index, slice):
+            return [self._get_item(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("list index out of range")
+        return self._get_item(index)
+
+    def __iter__(self):
+        if self._keys is None:
+            return list.__iter__(self)
+        return self._iter_lazily()
+
+    def _iter_lazily(self):
+        index = 0
+        while index < len(self):
+            yield self._get_item(index)
+            index += 1
+
+    def __contains__(self, item):
+        # Items are equal iff their positions are, so membership does not need any item to be created
+        if self._keys is None:
+            return list.__contains__(self, item)
+        position = getattr(item, 'position', None)
+        return position is not None and position in self.get_positions()
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def get_positions(self):
+        """
+        :return: positions of the items in this list, without creating any item
+        :rtype: list of (int,int)
+        """
+        if self._keys is None:
+            return [item.position for item in self]
+        get_position = self._get_position
+        return [get_position(key) for key in self._keys]
+
+
+def _create_all_first(name):
+    method = getattr(list, name)
+
+    def create_all_and_call(self, *args, **kwargs):
+        self._create_all()
+        return method(self, *args, **kwargs)
+    create_all_and_call.__name__ = name
+    create_all_and_call.__doc__ = method.__doc__
+    return create_all_and_call
+
+# These read the stored items directly, so the items that have not been created yet must be created first
+for _name in ('__setitem__', '__delitem__', '__add__', '__iadd__', '__mul__', '__rmul__', '__imul__', '__reversed__',
+              '__eq__', '__ne__', '__lt__', '__le__', '__gt__', '__ge__', '__repr__', '__reduce_ex__', 'append',
+              'extend', 'insert', 'remove', 'pop', 'clear', 'index', 'count', 'sort', 'reverse', 'copy'):
+    setattr(LazyList, _name, _create_all_first(_name))
@@ -1,28 +1,30 @@
 import functools
+import itertools
+from operator import add
+
+# Entries kept by each memoized function before the least recently used ones are evicted
+DEFAULT_CACHE_SIZE = 4096
+
+_memoized_functions = []
 
 class memoized(object):
     '''Decorator. Caches a function's return value each time it is called.
     If called later with the same arguments, the cached value is returned
-    (not reevaluated). Taken from https://wiki.python.org/moin/PythonDecoratorLibrary#Memoize
+    (not reevaluated). Based on https://wiki.python.org/moin/PythonDecoratorLibrary#Memoize
+
+    At most maxsize results are kept, least recently used first out, so memory stays bounded over long
+    matches and tournaments. All memoized caches are emptied when the map dimensions change.
     '''
 
-    def __init__(self, func):
+    def __init__(self, func, maxsize=DEFAULT_CACHE_SIZE):
         self.func = func
-        self.cache = {}
+        self.cached = functools.lru_cache(maxsize=maxsize)(func)
         self.__doc__ = func.__doc__
         self.__repr__ = func.__repr__
+        _memoized_functions.append(self)
 
     def __call__(self, *args):
-        # if not isinstance(args, collections.Hashable):
-        #     # uncacheable. a list, for instance.
-        #     # better to not cache than blow up.
-        #     return self.func(*args)
-        if args in self.cache:
-            return self.cache[args]
-        else:
-            value = self.func(*args)
-            self.cache[args] = value
-            return value
+        return self.cached(*args)
 
     def __get__(self, obj, objtype):
         '''Support instance methods.'''
@@ -31,9 +33,89 @@ class memoized(object):
         f.__repr__ = self.func.__repr__
         return f
 
-# Below functions are memoized because they are often called many times in large loops
+    def cache_info(self):
+        return self.cached.cache_info()
+
+    def cache_clear(self):
+        self.cached.cache_clear()
+
+# Lookup tables of the current map, rebuilt by set_map_dimensions
+_map_width = 0
+_map_height = 0
+_map_size = (0, 0)
+# Canonical (x, y) tuples of the cells of the current map, indexed by x * height + y
+_point_table = []
+# Canonical wrapped point of every (x, y) with -1 <= x <= width and -1 <= y <= height,
+# which covers every point one move away from the map
+_wrap_table = {}
+# Lookups answered by _wrap_table. next() on a counter costs less than a global += 1 in mod_point, and since
+# reading the count takes a value too, cache_stats subtracts its own reads.
+_wrap_table_hits = itertools.count()
+_wrap_table_hit_reads = 0
+
+def set_map_dimensions(width, height):
+    """
+    Rebuilds the point lookup tables for a width x height map and empties every memoized cache.
+    Called when a map is loaded, so nothing computed for one match is kept into the next.
+
+    :param int width: map width
+    :param int height: map height
+    """
+    global _map_width, _map_height, _map_size, _point_table, _wrap_table, _wrap_table_hits, _wrap_table_hit_reads
+    _map_width, _map_height, _map_size = width, height, (width, height)
+    _point_table = [(x, y) for x in range(width) for y in range(height)]
+    _wrap_table = {(x, y): _point_table[(x % width) * height + y % height] for x in range(-1, width + 1) for y in range(-1, height + 1)}
+    _wrap_table_hits, _wrap_table_hit_reads = itertools.count(), 0
+    for function in _memoized_functions:
+        function.cache_clear()
+
+def get_point_table(width, height):
+    """
+    Returns the canonical tuple of every cell of a width x height map. The table is rebuilt when the map size
+    changes, so while a map is played every (x, y) on it is a single tuple object shared by all modules.
+
+    :param int width: map width
+    :param int height: map height
+    :return: list of (x,y) tuples indexed by x * height + y
+    :rtype: list of (int,int)
+    """
+    if (width, height) != _map_size:
+        set_map_dimensions(width, height)
+    return _point_table
+
+def intern_point(x, y):
+    """
+    :return: the canonical tuple for (x, y) if it lies on the current map, else a new tuple
+    :rtype: (int,int)
+    """
+    if 0 <= x < _map_width and 0 <= y < _map_height:
+        return _point_table[x * _map_height + y]
+    return (x, y)
+
+def cache_stats():
+    """
+    Reports how well the point caches are doing since the map dimensions were last set.
+    The misses of the mod_point table are the calls that fell through to _mod_point.
+
+    :return: dictionary from cache name to a dictionary with its 'size', 'max_size', 'hits', 'misses' and 'hit_rate'
+    :rtype: dict
+    """
+    global _wrap_table_hit_reads
+    table_hits = next(_wrap_table_hits) - _wrap_table_hit_reads
+    _wrap_table_hit_reads += 1
+    fallback_info = _mod_point.cache_info()
+    stats = {'mod_point_table': _get_stats(len(_wrap_table), len(_wrap_table), table_hits, fallback_info.hits + fallback_info.misses)}
+    for function in _memoized_functions:
+        info = function.cache_info()
+        stats[function.func.__name__] = _get_stats(info.currsize, info.maxsize, info.hits, info.misses)
+    return stats
+
+def _get_stats(size, max_size, hits, misses):
+    calls = hits + misses
+    return {'size': size, 'max_size': max_size, 'hits': hits, 'misses': misses, 'hit_rate': hits / calls if calls else 0.0}
+
+# Adding and subtracting two tuples is cheaper than looking the result up, so these are not cached
 
-@memoized
 def add_points(p1, p2):
     """
     Adds two points together
@@ -43,9 +125,8 @@ def add_points(p1, p2):
     :return: (p1.x + p2.x, p1.y + p2.y)
     :rtype: (int,int)
     """
-    return tuple(map(lambda x, y: x + y, p1, p2))
+    return (p1[0] + p2[0], p1[1] + p2[1])
 
-@memoized
 def sub_points(p1, p2):
     """
         Subtracts p2 from p1
@@ -55,9 +136,8 @@ def sub_points(p1, p2):
         :return: (p1.x - p2.x, p1.y - p2.y)
         :rtype: (int,int)
         """
-    return tuple(map(lambda x, y: x - y, p1, p2))
+    return (p1[0] - p2[0], p1[1] - p2[1])
 
-@memoized
 def mod_point(point, mod_tuple):
     """
     :param (int,int) point: (x,y) point
@@ -65,6 +145,15 @@ def mod_point(point, mod_tuple):
     :return: (point[0] % mod_tuple[0], point[1] % mod_tuple[1])
     :rtype: (int,int)
     """
+    if mod_tuple == _map_size:
+        wrapped = _wrap_table.get(point)
+        if wrapped is not None:
+            next(_wrap_table_hits)
+            return wrapped
+    return _mod_point(point, mod_tuple)
+
+@memoized
+def _mod_point(point, mod_tuple):
     return tuple(map(lambda n, k: n % k, point, mod_tuple))
 
 def mod_taxi_cab_distance(p1, p2, width, height):
@@ -80,4 +169,62 @@ def get_smaller_mod_distance_on_line(a, b, length):
         smaller, bigger = b, a
     outer = smaller + abs(length-bigger)
     if inner < outer: return inner
-    return outer
\ No newline at end of file
+    return outer
+
+# Batch versions of the above, for points on a width x height map
+
+def get_mod_distances_on_line(length):
+    """
+    :param int length: length of the wrapped line
+    :return: list whose entry (a - b) % length is the wrapped distance between a and b, for 0 <= a, b < length
+    :rtype: list of int
+    """
+    return [min(delta, length - delta) for delta in range(length)]
+
+def mod_taxi_cab_distances(source, targets, width, height):
+    """
+    :param (int,int) source: point on the map
+    :param list targets: points on the map
+    :return: list of the taxi-cab distances on the torus from source to each of targets
+    :rtype: list of int
+    """
+    return mod_taxi_cab_distance_matrix([source], targets, width, height)[0]
+
+def mod_taxi_cab_distance_matrix(sources, targets, width, height):
+    """
+    Same distances as mod_taxi_cab_distance for every pair, computed one row at a time.
+    Rows of sources that share a column or a row share their partial results.
+
+    :param list sources: points on the map
+    :param list targets: points on the map
+    :return: matrix whose entry [i][j] is the taxi-cab distance on the torus from sources[i] to targets[j]
+    :rtype: list of list of int
+    """
+    line_x, line_y = get_mod_distances_on_line(width), get_mod_distances_on_line(height)
+    target_xs = [target[0] for target in targets]
+    target_ys = [target[1] for target in targets]
+    dx_rows, dy_rows = {}, {}
+
+    matrix = []
+    for x, y in sources:
+        dx_row = dx_rows.get(x)
+        if dx_row is None:
+            dx_row = dx_rows[x] = [line_x[(x - target_x) % width] for target_x in target_xs]
+        dy_row = dy_rows.get(y)
+        if dy_row is None:
+            dy_row = dy_rows[y] = [line_y[(y - target_y) % height] for target_y in target_ys]
+        matrix.append(list(map(add, dx_row, dy_row)))
+    return matrix
+
+def mod_taxi_cab_distance_field(target, width, height):
+    """
+    Taxi-cab distances on the torus from every cell to target, e.g. as an A* heuristic over cell ids.
+
+    :param (int,int) target: point on the map
+    :return: list of distances indexed by x * height + y
+    :rtype: list of int
+    """
+    line_x, line_y = get_mod_distances_on_line(width), get_mod_distances_on_line(height)
+    dx = [line_x[(x - target[0]) % width] for x in range(width)]
+    dy = [line_y[(y - target[1]) % height] for y in range(height)]
+    return [dx_value + dy_value for dx_value in dx for dy_value in dy]
@@ -0,0 +1,15 @@
+from PythonClientAPI.Game.LazyList import LazyList
+
+
+class TileView(LazyList):
+    """
+    List of Tiles over a list of cell ids. Each Tile is only created the first time it is accessed, so listing
+    a large territory costs nothing until its Tiles are actually used.
+    """
+    def __init__(self, cells, get_tile, points):
+        """
+        :param list cells: cell ids of the Tiles
+        :param function get_tile: takes a cell id and returns its Tile
+        :param list points: (x,y) position of every cell id
+        """
+        LazyList.__init__(self, cells, get_tile, points.__getitem__)
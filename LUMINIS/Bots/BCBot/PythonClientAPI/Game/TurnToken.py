@@ -0,0 +1,30 @@
+class TurnCancelled(Exception):
+    """
+    Raised by World queries and path searches once the turn they are running for has been cancelled,
+    so that a do_move that overran its turn stops instead of computing moves nobody will send.
+    """
+    def __init__(self, turn):
+        Exception.__init__(self, "Turn {0} was cancelled".format(turn))
+        self.turn = turn
+
+
+class TurnToken:
+    """
+    Cancellation flag of one turn of the AI, shared by the protocol thread that cancels it and the AI thread that checks it.
+
+    :ivar int turn: number of the turn
+    :ivar bool cancelled: True once the turn has been cancelled
+    """
+    def __init__(self, turn):
+        self.turn = turn
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        """
+        :raises TurnCancelled: if the turn has been cancelled
+        """
+        if self.cancelled:
+            raise TurnCancelled(self.turn)
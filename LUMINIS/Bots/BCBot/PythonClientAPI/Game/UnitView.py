@@ -0,0 +1,22 @@
+from PythonClientAPI.Game.LazyList import LazyList
+
+
+class UnitView(LazyList):
+    """
+    List of units over their decoded JSON entries. Each unit is only created the first time it is accessed,
+    and is then kept for the rest of the turn so that the same entry always yields the same object.
+    """
+    def __init__(self, entries, create_unit, get_position):
+        """
+        :param list entries: decoded JSON entries, one per unit
+        :param function create_unit: takes an entry and returns the unit
+        :param function get_position: takes an entry and returns the (x,y) position of the unit
+        """
+        LazyList.__init__(self, list(entries), create_unit, get_position)
+
+    def __contains__(self, unit):
+        # Units are equal iff their uuids are, so membership does not need any unit to be created
+        if self._keys is None:
+            return list.__contains__(self, unit)
+        uuid = getattr(unit, 'uuid', None)
+        return uuid is not None and any(entry['uuid'] == uuid for entry in self._keys)
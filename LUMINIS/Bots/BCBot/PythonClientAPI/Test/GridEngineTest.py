@@ -0,0 +1,189 @@
+from unittest import TestCase
+import random
+import unittest
+
+from PythonClientAPI.DataStructures.Collections import PriorityQueue, Queue
+from PythonClientAPI.Game.Entities import Tile
+from PythonClientAPI.Game.Enums import TileType, Direction, Team
+from PythonClientAPI.Game.PointUtils import mod_point, mod_taxi_cab_distance
+from PythonClientAPI.Game.World import World
+from PythonClientAPI.Navigation.GridEngine import GridEngine
+
+
+def tuple_shortest_path(tiles, start, end, avoid):
+    # The tuple-based A* that GridEngine replaced, kept as a reference
+    width, height = len(tiles), len(tiles[0])
+    is_wall = lambda point: tiles[point[0]][point[1]] == TileType.WALL
+    if start == end: return [end]
+    if is_wall(start) or is_wall(end): return None
+
+    queue = PriorityQueue()
+    queue.add(start, 0)
+    inverted_tree = {start: None}
+    movement_costs = {start: 0}
+
+    while not queue.is_empty():
+        current = queue.poll()
+        for direction in Direction.ORDERED_DIRECTIONS:
+            neighbour = mod_point(direction.move_point(current), (width, height))
+            if is_wall(neighbour) or (avoid and (neighbour in avoid)):
+                continue
+            cost = movement_costs[current] + 1
+            if (neighbour not in movement_costs) or (cost < movement_costs[neighbour]):
+                movement_costs[neighbour] = cost
+                queue.add(neighbour, cost + mod_taxi_cab_distance(neighbour, end, width, height))
+                inverted_tree[neighbour] = current
+
+        if current == end:
+            path = []
+            cursor = end
+            while inverted_tree[cursor]:
+                path.append(cursor)
+                cursor = inverted_tree[cursor]
+            path.reverse()
+            return path
+
+    return None
+
+
+def tuple_closest_points(tiles, source):
+    # Every reachable point in the order the tuple-based get_closest_point_from visited them
+    width, height = len(tiles), len(tiles[0])
+    queue = Queue()
+    visited = {source}
+    queue.add(source)
+    order = []
+    while not queue.is_empty():
+        cursor = queue.poll()
+        for direction in Direction.ORDERED_DIRECTIONS:
+            neighbour = mod_point(direction.move_point(cursor), (width, height))
+            if not ((neighbour in visited) or tiles[neighbour[0]][neighbour[1]] == TileType.WALL):
+                queue.add(neighbour)
+                visited.add(neighbour)
+        order.append(cursor)
+    return order
+
+
+def random_tiles(generator, width, height):
+    return [[TileType.WALL if generator.random() < 0.25 else TileType.TILE for y in range(height)] for x in range(width)]
+
+
+class TestGridEngine(TestCase):
+
+    def setUp(self):
+        self.ordered_directions = Direction.ORDERED_DIRECTIONS
+
+    def tearDown(self):
+        Direction.ORDERED_DIRECTIONS = self.ordered_directions
+
+    def test_matches_tuple_search(self):
+        generator = random.Random(2017)
+        for ordered_directions in ([Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST],
+                                   [Direction.WEST, Direction.SOUTH, Direction.EAST, Direction.NORTH]):
+            Direction.ORDERED_DIRECTIONS = ordered_directions
+            width, height = 11, 9
+            tiles = random_tiles(generator, width, height)
+            engine = GridEngine(tiles)
+            points = [(x, y) for x in range(width) for y in range(height)]
+            for i in range(300):
+                start, end = generator.choice(points), generator.choice(points)
+                avoid = set(generator.sample(points, 5)) if i % 2 else None
+                self.assertEqual(tuple_shortest_path(tiles, start, end, avoid), engine.get_shortest_path(start, end, avoid))
+
+    def test_max_expansions(self):
+        tiles = [[TileType.TILE for y in range(9)] for x in range(9)]
+        engine = GridEngine(tiles)
+        heuristic = engine.get_heuristic(engine.get_cell((4, 4)))
+        partial_path = engine.get_shortest_path((0, 0), (4, 4), None, max_expansions=3)
+        self.assertNotEqual((4, 4), partial_path[-1])
+        self.assertEqual(len(partial_path), heuristic[engine.get_cell((0, 0))] - heuristic[engine.get_cell(partial_path[-1])])
+        self.assertEqual(8, len(engine.get_shortest_path((0, 0), (4, 4), None, max_expansions=100)))
+        self.assertIsNone(engine.get_shortest_path((0, 0), (4, 4), None, deadline=0))
+
+    def test_unreachable_targets(self):
+        tiles = [[TileType.TILE for y in range(9)] for x in range(9)]
+        for x, y in [(3, 4), (5, 4), (4, 3), (4, 5)]:
+            tiles[x][y] = TileType.WALL
+        engine = GridEngine(tiles)
+        self.assertFalse(engine.are_connected((0, 0), (4, 4)))
+        self.assertTrue(engine.are_connected((0, 0), (8, 8)))
+        self.assertFalse(engine.are_connected((0, 0), (3, 4)))
+        self.assertIsNone(engine.get_shortest_path((0, 0), (4, 4), None, max_expansions=1))
+
+
+class TestDistanceField(TestCase):
+
+    def setUp(self):
+        self.generator = random.Random(2017)
+        self.width, self.height = 11, 9
+        self.tiles = random_tiles(self.generator, self.width, self.height)
+        self.world = World(self.tiles, [], [], {Team.FRIENDLY: [], Team.ENEMY: []}, {Team.FRIENDLY: [], Team.ENEMY: []})
+        self.points = [(x, y) for x in range(self.width) for y in range(self.height) if self.tiles[x][y] == TileType.TILE]
+
+    def test_distances_and_paths(self):
+        for source in self.generator.sample(self.points, 10):
+            field = self.world.get_distance_field(source)
+            self.assertTrue(field.is_complete())
+            for target in self.points:
+                path = self.world.get_shortest_path(source, target, None)
+                if path is None:
+                    self.assertIsNone(field.get_distance(target))
+                    self.assertIsNone(field.get_path(target))
+                    self.assertEqual(source, field.get_next_point(target))
+                elif source == target:
+                    self.assertEqual(0, field.get_distance(target))
+                    self.assertEqual([target], field.get_path(target))
+                else:
+                    self.assertEqual(len(path), field.get_distance(target))
+                    field_path = field.get_path(target)
+                    self.assertEqual(len(path), len(field_path))
+                    self.assertEqual(target, field_path[-1])
+                    self.assertEqual(field_path[0], field.get_next_point(target))
+
+    def test_closest_points_match_breadth_first_order(self):
+        for source in self.generator.sample(self.points, 10):
+            order = tuple_closest_points(self.tiles, source)
+            for target in self.generator.sample(order, 3):
+                self.assertEqual(target, self.world.get_closest_point_from(source, lambda p: p == target))
+            self.assertEqual(order[1:4], self.world.get_distance_field(source).get_closest_points(lambda p: p != source, 3))
+
+    def test_field_is_cached_for_the_turn(self):
+        source = self.points[0]
+        self.world.get_closest_point_from(source, lambda p: False)
+        self.assertIs(self.world.get_distance_field(source), self.world.get_distance_field(source))
+
+    def test_closest_point_budget(self):
+        source = self.points[0]
+        order = tuple_closest_points(self.tiles, source)
+        self.assertIsNone(self.world.get_closest_point_from(source, lambda p: p == order[5], max_expansions=5))
+        self.assertEqual(order[5], self.world.get_closest_point_from(source, lambda p: p == order[5], max_expansions=6))
+        self.assertIsNone(self.world.get_closest_point_from(source, lambda p: p == order[5], deadline=0))
+
+    def test_path_distance_matrix(self):
+        sources = self.generator.sample(self.points, 3)
+        targets = self.generator.sample(self.points, 7)
+        expected = [[self.world.get_shortest_path_distance(source, target) for target in targets] for source in sources]
+        self.assertEqual(expected, self.world.get_path_distance_matrix(sources, targets))
+        # More sources than targets searches from the targets instead
+        self.assertEqual([list(column) for column in zip(*expected)], self.world.get_path_distance_matrix(targets, sources))
+
+    def test_next_points_towards_capturable_tiles(self):
+        capturable = set(self.generator.sample(self.points, 5))
+        friendly_tiles = [Tile(point, Team.FRIENDLY, False) for point in self.points if point not in capturable]
+        world = World(self.tiles, [], [], {Team.FRIENDLY: friendly_tiles, Team.ENEMY: []}, {Team.FRIENDLY: [], Team.ENEMY: []})
+
+        def distance_to_capturable(point):
+            field = world.get_distance_field(point)
+            distances = [field.get_distance(target) for target in capturable]
+            return min([distance for distance in distances if distance is not None], default=None)
+
+        for point, next_point in zip(self.points, world.get_next_points_towards_capturable_tiles(self.points)):
+            distance = distance_to_capturable(point)
+            if not distance:
+                self.assertEqual(point, next_point)
+            else:
+                self.assertEqual(1, world.get_taxicab_distance(point, next_point))
+                self.assertEqual(distance - 1, distance_to_capturable(next_point))
+
+if __name__ == '__main__':
+    unittest.main()
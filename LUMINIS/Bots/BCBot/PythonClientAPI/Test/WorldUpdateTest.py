@@ -0,0 +1,123 @@
+from unittest import TestCase
+import random
+import unittest
+
+import PythonClientAPI.Configurator.Constants as constants
+import PythonClientAPI.Game.JSON as JSON
+from PythonClientAPI.Game.Enums import TileType
+
+FRIENDLY_UUID = "friendly"
+ENEMY_UUID = "enemy"
+
+
+def random_game_state(generator, tiles):
+    width, height = len(tiles), len(tiles[0])
+    open_points = [(x, y) for x in range(width) for y in range(height) if tiles[x][y] != TileType.WALL]
+    owned = generator.sample(open_points, len(open_points) // 2)
+    split = generator.randrange(len(owned))
+
+    def player(team, points, unit_count):
+        units = [{'team': team, 'uuid': team + str(i), 'LF': generator.randrange(1, 10),
+                  'position': {'x': point[0], 'y': point[1]}, 'lastMoveResult': 'NEWLY_SPAWNED', 'mergedUnitUuids': []}
+                 for i, point in enumerate(generator.sample(points, min(unit_count, len(points))))]
+        return {'friendlyUnits': units,
+                'friendlyTilePositions': [[x, y, generator.randrange(2)] for x, y in points],
+                'friendlyNestPositions': [list(point) for point in generator.sample(points, min(4, len(points)))]}
+
+    return {'playerUUIDToPlayerTypeMap': {FRIENDLY_UUID: player(FRIENDLY_UUID, owned[:split], 5),
+                                          ENEMY_UUID: player(ENEMY_UUID, owned[split:], 5)},
+            'playerIndexToUUIDMap': {'0': FRIENDLY_UUID, '1': ENEMY_UUID}}
+
+
+class TestWorldUpdate(TestCase):
+
+    def setUp(self):
+        constants.LOCAL_PLAYER_UUID = FRIENDLY_UUID
+        self.generator = random.Random(11)
+        self.tiles = [[TileType.WALL if self.generator.random() < 0.2 else TileType.TILE for y in range(9)] for x in range(11)]
+
+    def assertSameWorld(self, expected, actual):
+        for getter in ('get_friendly_tiles', 'get_enemy_tiles', 'get_neutral_tiles'):
+            self.assertEqual(sorted((tile.position, tile.is_permanently_owned()) for tile in getattr(expected, getter)()),
+                             sorted((tile.position, tile.is_permanently_owned()) for tile in getattr(actual, getter)()))
+        for point, tile in expected.get_position_to_tile_dict().items():
+            actual_tile = actual.get_tile_at(point)
+            self.assertEqual((tile.is_friendly(), tile.is_enemy(), tile.is_permanently_owned()),
+                             (actual_tile.is_friendly(), actual_tile.is_enemy(), actual_tile.is_permanently_owned()))
+        self.assertEqual(len(expected.get_position_to_tile_dict()), len(actual.get_position_to_tile_dict()))
+        for getter in ('get_friendly_nest_clusters', 'get_enemy_nest_clusters'):
+            self.assertEqual(sorted(map(sorted, getattr(expected, getter)())), sorted(map(sorted, getattr(actual, getter)())))
+        self.assertEqual(set(expected.uuid_to_friendlies_map), set(actual.uuid_to_friendlies_map))
+
+    def test_updates_match_full_reconstruction(self):
+        world = JSON.as_initial_world(self.tiles)
+        for turn in range(10):
+            dct = random_game_state(self.generator, self.tiles)
+            game_state = JSON.update_game_state(dct, world)
+            self.assertIs(world, game_state.world)
+            self.assertSameWorld(JSON.as_game_state(dct, self.tiles).world, world)
+
+    def test_unchanged_tiles_are_reused(self):
+        world = JSON.as_initial_world(self.tiles)
+        dct = random_game_state(self.generator, self.tiles)
+        JSON.update_game_state(dct, world)
+        tiles_before = dict(world.get_position_to_tile_dict())
+        clusters_before = world.get_friendly_nest_clusters()
+
+        flipped = dct['playerUUIDToPlayerTypeMap'][ENEMY_UUID]['friendlyTilePositions'].pop()
+        JSON.update_game_state(dct, world)
+
+        flipped_point = (flipped[0], flipped[1])
+        self.assertTrue(world.get_tile_at(flipped_point).is_neutral())
+        self.assertIn(flipped_point, [tile.position for tile in world.get_neutral_tiles()])
+        for point, tile in world.get_position_to_tile_dict().items():
+            if point != flipped_point:
+                self.assertIs(tiles_before[point], tile)
+        self.assertIs(clusters_before, world.get_friendly_nest_clusters())
+
+    def test_enemy_units_are_created_on_access(self):
+        dct = random_game_state(self.generator, self.tiles)
+        game_state = JSON.update_game_state(dct, JSON.as_initial_world(self.tiles))
+        enemies = game_state.player_uuid_to_player_type_map[ENEMY_UUID].friendly_units
+        created_units = lambda: sum(unit is not None for unit in list.__iter__(enemies))
+
+        closest = game_state.world.get_closest_enemy_from(enemies.get_positions()[0], None)
+        self.assertEqual(1, created_units())
+        self.assertIs(enemies[0], closest)
+        self.assertIn(closest, enemies)
+        self.assertEqual(1, created_units())
+        self.assertIs(closest, game_state.world.get_position_to_enemy_dict()[closest.position])
+
+        health = [unit['LF'] for unit in dct['playerUUIDToPlayerTypeMap'][ENEMY_UUID]['friendlyUnits']]
+        self.assertEqual(sorted(health), [unit.health for unit in enemies])
+
+    def test_enemy_units_can_be_changed_like_a_list(self):
+        dct = random_game_state(self.generator, self.tiles)
+        game_state = JSON.update_game_state(dct, JSON.as_initial_world(self.tiles))
+        enemies = game_state.player_uuid_to_player_type_map[ENEMY_UUID].friendly_units
+        self.assertIsInstance(enemies, list)
+        closest = game_state.world.get_closest_enemy_from(enemies.get_positions()[0], None)
+
+        units = list(enemies)
+        enemies.sort(key=lambda unit: unit.health, reverse=True)
+        self.assertEqual(sorted(units, key=lambda unit: unit.health, reverse=True), enemies)
+        enemies.remove(closest)
+        enemies.append(closest)
+        self.assertIs(closest, enemies[-1])
+        self.assertEqual([unit.position for unit in enemies], enemies.get_positions())
+
+        # The search still returns the unit itself once do_move has reordered the list
+        self.assertIs(closest, game_state.world.get_closest_enemy_from(closest.position, None))
+
+    def test_decoded_positions_are_interned(self):
+        world = JSON.as_initial_world(self.tiles)
+        game_state = JSON.update_game_state(random_game_state(self.generator, self.tiles), world)
+        friendlies = game_state.player_uuid_to_player_type_map[FRIENDLY_UUID].friendly_units
+        for unit in friendlies:
+            self.assertIs(world.get_tile_at(unit.position).position, unit.position)
+            self.assertFalse(hasattr(unit, '__dict__'))
+        for nest in world.get_friendly_nest_positions():
+            self.assertIs(world.get_ownership_grid().points[nest[0] * len(self.tiles[0]) + nest[1]], nest)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import socket as s
+import time
 
 END_OF_MESSAGE_DELIMITER = '\n'
 MAX_BYTES_TO_RECEIVE = 1
@@ -8,6 +9,7 @@ STRING_ENCODING = 'utf-8'
 class ClientChannelHandler():
     def __init__(self):
         self.connected = False
+        self.last_message_time = None
 
     def start_socket_connection(self, port_number, host_name):
         try:
@@ -42,6 +44,8 @@ class ClientChannelHandler():
         self.check_socket_connection()
 
         size_bytes = self.buffered_recv(4)
+        # Turn deadlines are measured from here, before the message is read and decoded
+        self.last_message_time = time.time()
         size = int.from_bytes(size_bytes, byteorder='big')
 
         message_bytes = self.buffered_recv(size)
@@ -0,0 +1,171 @@
+from itertools import compress
+
+from PythonClientAPI.Game.Enums import Team, Direction
+from PythonClientAPI.Game.MapTopology import get_map_topology
+
+NEUTRAL_CODE = 0
+FRIENDLY_CODE = 1
+ENEMY_CODE = 2
+WALL_CODE = 3
+
+TEAM_TO_CODE = {Team.NEUTRAL: NEUTRAL_CODE, Team.FRIENDLY: FRIENDLY_CODE, Team.ENEMY: ENEMY_CODE}
+CODE_TO_TEAM = {code: team for team, code in TEAM_TO_CODE.items()}
+
+# bytes.translate tables turning a grid into a string of binary digits, one per cell
+_ZERO, _ONE = ord('0'), ord('1')
+_EQUALS_TABLES = {code: bytes(_ONE if value == code else _ZERO for value in range(256)) for code in range(WALL_CODE + 1)}
+_NONZERO_TABLE = bytes(_ZERO if value == 0 else _ONE for value in range(256))
+_DIGIT_TO_FLAG_TABLE = bytes(value == _ONE for value in range(256))
+# bytes.translate tables turning a grid into one 0 or 1 byte per cell, for itertools.compress
+_EQUALS_FLAG_TABLES = {code: bytes(value == code for value in range(256)) for code in range(WALL_CODE + 1)}
+
+
+def _to_mask(grid, table):
+    # The last cell becomes the most significant digit, so cell id i ends up as bit i
+    return int(grid.translate(table)[::-1], 2)
+
+
+class OwnershipGrid:
+    """
+    Ownership of every cell of the map, in flat byte arrays indexed by cell id x * height + y.
+
+    Whole-board queries work on masks: Python ints whose bit i is set iff cell id i is in the set.
+    Masks are combined with &, | and ~ and moved around the torus with get_adjacent_mask, so a query
+    over the whole board costs a handful of big-int operations instead of a loop over cells.
+
+    :ivar bytearray teams: NEUTRAL_CODE, FRIENDLY_CODE, ENEMY_CODE or WALL_CODE of each cell
+    :ivar bytearray permanent: 1 for each permanently owned cell
+    :ivar bytes walls: 1 for each wall
+    """
+    def __init__(self, tiles):
+        topology = get_map_topology(tiles)
+        self.width = topology.width
+        self.height = topology.height
+        self.cell_count = topology.cell_count
+
+        self.walls = topology.walls
+        self._empty_teams = bytes(WALL_CODE if wall else NEUTRAL_CODE for wall in self.walls)
+        self._empty_permanent = bytes(self.cell_count)
+        self.teams = bytearray(self._empty_teams)
+        self.permanent = bytearray(self._empty_permanent)
+
+        self.points = topology.points
+        self.full_mask = (1 << self.cell_count) - 1
+        self._first_row_mask = topology.edge_masks[Direction.NORTH]
+        self._last_row_mask = topology.edge_masks[Direction.SOUTH]
+        self.walls_mask = _to_mask(self.walls, _NONZERO_TABLE)
+
+    def get_cell(self, point):
+        return point[0] * self.height + point[1]
+
+    def load(self, team_to_tile_states):
+        """
+        Replaces the ownership of the whole board.
+
+        :param dict team_to_tile_states: Team.FRIENDLY and Team.ENEMY to lists of (x, y, permanent) owned cells,
+            where permanent is 1 or True for permanently owned cells. Cells not listed are neutral.
+        :return: ids of the cells whose owner or permanence changed
+        :rtype: list of int
+        """
+        teams = bytearray(self._empty_teams)
+        permanent = bytearray(self._empty_permanent)
+        height = self.height
+        for team, states in team_to_tile_states.items():
+            code = TEAM_TO_CODE[team]
+            if code == NEUTRAL_CODE: continue
+            for state in states:
+                cell = state[0] * height + state[1]
+                teams[cell] = code
+                permanent[cell] = state[2] == 1
+
+        changed = (int.from_bytes(teams, 'little') ^ int.from_bytes(self.teams, 'little')) | \
+                  (int.from_bytes(permanent, 'little') ^ int.from_bytes(self.permanent, 'little'))
+        self.teams, self.permanent = teams, permanent
+        if not changed: return []
+
+        # Every byte of the xor that differs from zero is a changed cell
+        return list(compress(range(self.cell_count), changed.to_bytes(self.cell_count, 'little')))
+
+    def get_team(self, point):
+        """
+        :return: owner of the cell at point, Team.NEUTRAL for neutral cells, or None for walls
+        :rtype: Team
+        """
+        return CODE_TO_TEAM.get(self.teams[point[0] * self.height + point[1]])
+
+    def is_permanent(self, point):
+        return self.permanent[point[0] * self.height + point[1]] == 1
+
+    def count(self, team):
+        """
+        :return: number of cells owned by team, or of neutral cells for Team.NEUTRAL
+        :rtype: int
+        """
+        return self.teams.count(TEAM_TO_CODE[team])
+
+    def get_team_mask(self, team):
+        """
+        :return: mask of the cells owned by team, or of the neutral cells for Team.NEUTRAL
+        :rtype: int
+        """
+        return _to_mask(self.teams, _EQUALS_TABLES[TEAM_TO_CODE[team]])
+
+    def get_permanent_mask(self):
+        return _to_mask(self.permanent, _NONZERO_TABLE)
+
+    def get_capturable_mask(self):
+        """
+        :return: mask of the neutral and enemy cells that are not permanently owned
+        :rtype: int
+        """
+        return (self.get_team_mask(Team.NEUTRAL) | self.get_team_mask(Team.ENEMY)) & ~self.get_permanent_mask()
+
+    def get_adjacent_mask(self, mask):
+        """
+        :param int mask: set of cells
+        :return: mask of the cells that have at least one of their four torus neighbours in mask
+        :rtype: int
+        """
+        cell_count, height = self.cell_count, self.height
+        first_row, last_row = self._first_row_mask, self._last_row_mask
+
+        # Moving one column is a rotation of the whole board by height bits
+        east = ((mask << height) | (mask >> (cell_count - height))) & self.full_mask
+        west = ((mask >> height) | (mask << (cell_count - height))) & self.full_mask
+        # Moving one row stays inside each column, so the first and last rows wrap around separately
+        south = ((mask & ~last_row) << 1) | ((mask & last_row) >> (height - 1))
+        north = ((mask & ~first_row) >> 1) | ((mask & first_row) << (height - 1))
+        return east | west | south | north
+
+    def get_capturable_frontier_mask(self):
+        """
+        :return: mask of the capturable cells next to friendly territory
+        :rtype: int
+        """
+        return self.get_capturable_mask() & self.get_adjacent_mask(self.get_team_mask(Team.FRIENDLY))
+
+    def get_team_cells(self, team):
+        """
+        :return: ids of the cells owned by team, or of the neutral cells for Team.NEUTRAL, in increasing order
+        :rtype: list of int
+        """
+        return list(compress(range(self.cell_count), self.teams.translate(_EQUALS_FLAG_TABLES[TEAM_TO_CODE[team]])))
+
+    def get_cells(self, mask):
+        """
+        :param int mask: set of cells
+        :return: ids of the cells in mask, in increasing order
+        :rtype: list of int
+        """
+        if not mask: return []
+        return list(compress(range(self.cell_count), bin(mask)[:1:-1].encode().translate(_DIGIT_TO_FLAG_TABLE)))
+
+    def get_points(self, mask):
+        """
+        :param int mask: set of cells
+        :return: points of the cells in mask, ordered by x then y
+        :rtype: list of (int,int)
+        """
+        if not mask: return []
+        # Binary digits of the mask, least significant first, as one 0 or 1 byte per cell
+        return list(compress(self.points, bin(mask)[:1:-1].encode().translate(_DIGIT_TO_FLAG_TABLE)))
@@ -1,8 +1,27 @@
+import time
+
+import PythonClientAPI.Communication.CommunicatorConstants as cc
+from PythonClientAPI.Game.Entities import Tile
 from PythonClientAPI.Game.Enums import TileType, Direction, Team
-from PythonClientAPI.Game.PointUtils import mod_point, mod_taxi_cab_distance
-from PythonClientAPI.DataStructures.Collections import Queue, PriorityQueue, recursively_flatten_list
+from PythonClientAPI.Game.MapTopology import get_map_topology
+from PythonClientAPI.Game.OwnershipGrid import OwnershipGrid, TEAM_TO_CODE, CODE_TO_TEAM, NEUTRAL_CODE, FRIENDLY_CODE, \
+    ENEMY_CODE
+from PythonClientAPI.Game.TileView import TileView
+from PythonClientAPI.Game.UnitView import UnitView
+from PythonClientAPI.Game.PointUtils import mod_point, mod_taxi_cab_distance, mod_taxi_cab_distance_matrix
+from PythonClientAPI.DataStructures.Collections import Queue, recursively_flatten_list
+from PythonClientAPI.Navigation import Assignment, CooperativePlanner
+from PythonClientAPI.Navigation.DistanceField import DistanceField, get_distances_from_any
+from PythonClientAPI.Navigation.GridEngine import GridEngine
 from PythonClientAPI.Navigation.NavigationCache import navigation_cache
 
+# Navigation queries made while the cache is still loading wait for at most this fraction of the turn
+NAVIGATION_WAIT_FRACTION = 0.5
+# Expansion budget of the path search used when the cache did not finish loading in time
+FALLBACK_MAX_EXPANSIONS = 2000
+# Cooperative planning stops at this fraction of the turn, remaining units get uncoordinated moves
+PLANNING_DEADLINE_FRACTION = 0.8
+
 
 class PlayerAPI:
 
@@ -12,12 +31,80 @@ class PlayerAPI:
         self.height = len(tiles[0])
         self.friendlies = friendlies
         self.enemies = enemies
-        self.team_to_tiles_map = team_to_tiles_map
         self.team_to_nests_map = team_to_nests_map
+        self._set_topology()
+        self.ownership = OwnershipGrid(tiles)
+        self.ownership.load({team: [(tile.position[0], tile.position[1], tile.is_permanently_owned()) for tile in team_tiles]
+                             for team, team_tiles in team_to_tiles_map.items()})
 
         self._position_to_tile_cache = None
-        self._position_to_unit_cache = None
-        self._nest_clusters_cache = None
+        self._cell_to_tile_cache = [None] * self.ownership.cell_count
+        self._position_to_friendly_cache = None
+        self._position_to_enemy_index_cache = None
+        self._nest_clusters_cache = {}
+        self._grid_engine = None
+        self._distance_field_cache = {}
+        self._team_to_tiles_cache = {}
+        self._turn_token = None
+        self._start_turn()
+
+    def _start_turn(self):
+        self.get_topology()
+        self._position_to_friendly_cache = None
+        self._position_to_enemy_index_cache = None
+        self._distance_field_cache = {}
+        self._turn_start = time.time()
+        self._navigation_deadline = self._get_turn_deadline(NAVIGATION_WAIT_FRACTION)
+
+    def update(self, friendlies, enemies, team_to_tile_states, team_to_nests_map):
+        """
+        Applies the state of a new turn as a diff against the previous one.
+
+        Only tiles whose owner or permanence changed get new Tile objects, and only the tile lists and nest
+        clusters of teams that changed are rebuilt. Units are always replaced, since their moves are per turn.
+
+        :param list friendlies: FriendlyUnits of the new turn
+        :param list enemies: EnemyUnits of the new turn, or a UnitView of them
+        :param dict team_to_tile_states: Team.FRIENDLY and Team.ENEMY to lists of (x, y, permanent) owned tiles
+        :param dict team_to_nests_map: Team.FRIENDLY and Team.ENEMY to lists of nest positions
+        """
+        self.friendlies = friendlies
+        self.enemies = enemies
+        self._start_turn()
+
+        old_teams = self.ownership.teams
+        changed = self.ownership.load(team_to_tile_states)
+        if changed:
+            teams, points = self.ownership.teams, self.ownership.points
+            position_to_tile = self._position_to_tile_cache
+            for cell in changed:
+                self._team_to_tiles_cache.pop(CODE_TO_TEAM[old_teams[cell]], None)
+                self._team_to_tiles_cache.pop(CODE_TO_TEAM[teams[cell]], None)
+                self._cell_to_tile_cache[cell] = None
+                if position_to_tile:
+                    position_to_tile[points[cell]] = self._get_tile(cell)
+
+        for team, nests in team_to_nests_map.items():
+            if set(nests) != set(self.team_to_nests_map.get(team, ())):
+                self._nest_clusters_cache.pop(team, None)
+            self.team_to_nests_map[team] = nests
+
+    def set_turn_token(self, token):
+        self._turn_token = token
+        if self._grid_engine is not None: self._grid_engine.turn_token = token
+
+    def set_turn_start(self, turn_start):
+        self._turn_start = turn_start
+        self._navigation_deadline = self._get_turn_deadline(NAVIGATION_WAIT_FRACTION)
+
+    def get_deadline(self):
+        return self._get_turn_deadline(1)
+
+    def get_time_remaining(self):
+        return max(0.0, self.get_deadline() - time.time())
+
+    def check_turn(self):
+        if self._turn_token is not None: self._turn_token.check()
 
     def get_width(self):
         return self.width
@@ -28,148 +115,233 @@ class PlayerAPI:
     def get_taxicab_distance(self, start, end):
         return mod_taxi_cab_distance(start, end, self.width, self.height)
 
+    def get_taxicab_distance_matrix(self, sources, targets):
+        return mod_taxi_cab_distance_matrix(sources, targets, self.width, self.height)
+
     def is_within_bounds(self, point):
         return (0 <= point[0] < self.width) and (0 <= point[1] < self.height)
 
+    def get_topology(self):
+        # JSON replaces ORDERED_DIRECTIONS with a new list when it changes, so an identity check is enough
+        if Direction.ORDERED_DIRECTIONS is not self._ordered_directions: self._set_topology()
+        return self._topology
+
+    def _set_topology(self):
+        self._ordered_directions = Direction.ORDERED_DIRECTIONS
+        self._topology = get_map_topology(self.tiles, self._ordered_directions)
+
     def is_wall(self, point):
-        return self.tiles[point[0]][point[1]] == TileType.WALL
+        if not self.is_within_bounds(point): return self.tiles[point[0]][point[1]] == TileType.WALL
+        return self._topology.is_wall(point)
 
     def at_edge(self, point):
-        return self.is_within_bounds(point) and \
-               (point[0] == 0 or point[1] == 0 or point[0] == self.width - 1 or point[1] == self.height - 1)
+        return self.is_within_bounds(point) and self._topology.at_edge(point)
 
     def get_neighbours(self, point):
+        if self.is_within_bounds(point): return self._topology.get_neighbours(point)
         neighbours = {}
         for direction in Direction.ORDERED_DIRECTIONS:
             neighbours[direction] = mod_point(direction.move_point(point), (self.width, self.height))
         return neighbours
 
     # A* path-finding
-    def get_shortest_path(self, start, end, avoid):
-        if start == end: return [end]
-        if self.is_wall(start) or self.is_wall(end): return None
-
-        queue = PriorityQueue()
-
-        queue.add(start, 0)
-
-        inverted_tree = {}
-        movement_costs = {}
-
-        inverted_tree[start] = None
-        movement_costs[start] = 0
-
-        while not queue.is_empty():
-            current = queue.poll()
-
-            neighbours = self.get_neighbours(current)
-            for direction in Direction.ORDERED_DIRECTIONS:
-                neighbour = neighbours[direction]
-                if self.is_wall(neighbour) or (avoid and (neighbour in avoid)):
-                    continue
-                cost = movement_costs[current] + 1
-                if (neighbour not in movement_costs) or (cost < movement_costs[neighbour]):
-                    movement_costs[neighbour] = cost
-                    queue.add(neighbour,
-                              cost + mod_taxi_cab_distance(neighbour, end, self.get_width(), self.get_height()))
-                    inverted_tree[neighbour] = current
-
-            if current == end:
-                path = []
-                cursor = end
-                peek_cursor = inverted_tree[cursor]
-                while peek_cursor:
-                    path.append(cursor)
-                    cursor = peek_cursor
-                    peek_cursor = inverted_tree[cursor]
-                path.reverse()
-                return path
+    def get_shortest_path(self, start, end, avoid, max_expansions=None, deadline=None):
+        self.check_turn()
+        return self._get_grid_engine().get_shortest_path(start, end, avoid, max_expansions, deadline)
 
-        return None
+    def are_connected(self, start, end):
+        return self._topology.are_connected(start, end)
+
+    def _get_grid_engine(self):
+        if self._grid_engine is None or self._grid_engine.ordered_directions != Direction.ORDERED_DIRECTIONS:
+            self._grid_engine = GridEngine(self.tiles)
+            self._grid_engine.turn_token = self._turn_token
+        return self._grid_engine
 
     def get_next_point_in_shortest_path(self, start, end):
-        if not navigation_cache.loaded:
-            path = self.get_shortest_path(start, end, None)
-            if path: return path.get(0)
+        self.check_turn()
+        if not self._is_navigation_cache_ready():
+            path = self.get_shortest_path(start, end, None, self._get_fallback_max_expansions())
+            if path: return path[0]
             return start
         direction = navigation_cache.get_next_direction_in_path(start, end)
         return mod_point(direction.move_point(start), (self.get_width(), self.get_height()))
 
     def get_shortest_path_distance(self, start, end):
-        if not navigation_cache.loaded:
-            path = self.get_shortest_path(start, end, None)
-            if path: return len(path)
+        self.check_turn()
+        if not self._is_navigation_cache_ready():
+            path = self.get_shortest_path(start, end, None, self._get_fallback_max_expansions())
+            if path and path[-1] == end: return len(path)
             return 0
         return navigation_cache.get_distance(start, end)
 
-    def get_closest_enemy_from(self, point, excluding_units):
-        if not self._position_to_unit_cache: self._create_position_to_unit_cache()
-        target = self.get_closest_point_from(point, lambda p: (p in self._position_to_unit_cache) and (not self._position_to_unit_cache[p].is_friendly()) and ((not excluding_units) or (p not in excluding_units)))
-        if target: return self._position_to_unit_cache[target]
-        return None
-
-    def get_closest_friendly_from(self, point, excluding_units):
-        if not self._position_to_unit_cache: self._create_position_to_unit_cache()
-        target = self.get_closest_point_from(point, lambda p: (p in self._position_to_unit_cache) and self._position_to_unit_cache[p].is_friendly() and ((not excluding_units) or (p not in excluding_units)))
-        if target: return self._position_to_unit_cache[target]
+    def get_path_distance_matrix(self, sources, targets):
+        self.check_turn()
+        if not targets: return [[] for _ in sources]
+        if self._is_navigation_cache_ready():
+            return navigation_cache.get_distance_matrix(sources, targets)
+        return self._get_field_distance_matrix(sources, targets)
+
+    def _get_field_distance_matrix(self, sources, targets):
+        # Walls are the only obstacles, so distances are symmetric and one full search per point of the
+        # smaller side covers the whole matrix
+        engine = self._get_grid_engine()
+        if len(targets) < len(sources):
+            columns = [self.get_distance_field(target).distances for target in targets]
+            return [[max(column[cell], 0) for column in columns] for cell in map(engine.get_cell, sources)]
+        target_cells = [engine.get_cell(target) for target in targets]
+        rows = [self.get_distance_field(source).distances for source in sources]
+        return [[max(row[cell], 0) for cell in target_cells] for row in rows]
+
+    def assign_units_to_targets(self, sources, targets, cost, deadline=None):
+        self.check_turn()
+        if cost == "path":
+            costs = self.get_path_distance_matrix(sources, targets)
+            # A distance of 0 between different points means there is no path
+            unreachable = self.width * self.height
+            for source, row in zip(sources, costs):
+                if 0 not in row: continue
+                for index, distance in enumerate(row):
+                    if distance == 0 and targets[index] != source: row[index] = unreachable
+        elif cost == "taxicab":
+            costs = self.get_taxicab_distance_matrix(sources, targets)
+            unreachable = None
+        else:
+            raise ValueError("Unknown assignment cost " + repr(cost))
+
+        if deadline is None:
+            deadline = self._get_turn_deadline(PLANNING_DEADLINE_FRACTION)
+        self.check_turn()
+        indices = Assignment.assign(costs, deadline)
+        if unreachable is None: return indices
+        return [index if index >= 0 and row[index] != unreachable else -1 for index, row in zip(indices, costs)]
+
+    def _is_navigation_cache_ready(self):
+        if navigation_cache.loaded: return True
+        if not navigation_cache.loading: return False
+        return navigation_cache.wait_until_loaded(self._navigation_deadline - time.time())
+
+    def _get_fallback_max_expansions(self):
+        # A full search is only affordable when no cache is on its way
+        return FALLBACK_MAX_EXPANSIONS if navigation_cache.loading else None
+
+    def _get_turn_deadline(self, fraction):
+        return self._turn_start + fraction * cc.MAXIMUM_ALLOWED_RESPONSE_TIME / 1000
+
+    def plan_moves(self, starts_and_targets, deadline=None):
+        self.check_turn()
+        if deadline is None:
+            deadline = self._get_turn_deadline(PLANNING_DEADLINE_FRACTION)
+        return CooperativePlanner.plan_moves(self._get_grid_engine(), starts_and_targets, self._get_path_heuristic,
+                                             deadline, self._get_next_point_after_deadline)
+
+    def _get_next_point_after_deadline(self, start, end):
+        # Without the navigation cache a path search per unit would overrun the turn, so late units rest
+        if navigation_cache.loaded: return self.get_next_point_in_shortest_path(start, end)
+        return start
+
+    def _get_path_heuristic(self, target):
+        engine = self._get_grid_engine()
+        points = engine.points
+        unreachable = engine.cell_count
+
+        if self._is_navigation_cache_ready():
+            def heuristic(cell):
+                point = points[cell]
+                if point == target: return 0
+                return navigation_cache.get_distance(point, target) or unreachable
+        else:
+            # Walls are the only obstacles, so distances from target are distances to target
+            field = self._get_distance_field(target)
+            def heuristic(cell):
+                distance = field.get_distance(points[cell])
+                return unreachable if distance is None else distance
+
+        return heuristic
+
+    def get_closest_enemy_from(self, point, excluding_units, deadline=None):
+        if self._position_to_enemy_index_cache is None: self._create_position_to_unit_cache()
+        position_to_index = self._position_to_enemy_index_cache
+        target = self.get_closest_point_from(point, lambda p: (p in position_to_index) and ((not excluding_units) or (p not in excluding_units)), deadline=deadline)
+        if not target: return None
+        index = position_to_index[target]
+        if index < len(self.enemies) and self.enemies[index].position == target: return self.enemies[index]
+        # do_move reordered or removed enemy units since the index was built, so it is built again
+        self._position_to_enemy_index_cache = None
+        return self.get_closest_enemy_from(point, excluding_units, deadline)
+
+    def get_closest_friendly_from(self, point, excluding_units, deadline=None):
+        if self._position_to_friendly_cache is None: self._create_position_to_unit_cache()
+        position_to_unit = self._position_to_friendly_cache
+        target = self.get_closest_point_from(point, lambda p: (p in position_to_unit) and ((not excluding_units) or (p not in excluding_units)), deadline=deadline)
+        if target: return position_to_unit[target]
         return None
 
     def _create_position_to_unit_cache(self):
-        self._position_to_unit_cache = {}
-        for unit in self.friendlies + self.enemies:
-            self._position_to_unit_cache[unit.position] = unit
-
-    def get_closest_neutral_tile_from(self, point, excluding_points):
-        if not self._position_to_tile_cache: self._create_position_to_tile_cache()
-        target = self.get_closest_point_from(point, lambda p: (p in self._position_to_tile_cache) and (self._position_to_tile_cache[p].is_neutral()) and ((not excluding_points) or (p not in excluding_points)))
-        if target: return self._position_to_tile_cache[target]
+        self._position_to_friendly_cache = self.get_position_to_friendly_dict()
+        # Enemies are indexed by position only, so that the search does not create every EnemyUnit
+        enemy_positions = self.enemies.get_positions() if isinstance(self.enemies, UnitView) else [unit.position for unit in self.enemies]
+        self._position_to_enemy_index_cache = {position: index for index, position in enumerate(enemy_positions)}
+
+    def get_closest_neutral_tile_from(self, point, excluding_points, deadline=None):
+        return self._get_closest_tile_from(point, excluding_points, deadline, lambda code, permanent: code == NEUTRAL_CODE)
+
+    def get_closest_enemy_tile_from(self, point, excluding_points, deadline=None):
+        return self._get_closest_tile_from(point, excluding_points, deadline, lambda code, permanent: code == ENEMY_CODE)
+
+    def get_closest_capturable_tile_from(self, point, excluding_points, deadline=None):
+        return self._get_closest_tile_from(point, excluding_points, deadline, lambda code, permanent: code in (NEUTRAL_CODE, ENEMY_CODE) and not permanent)
+
+    def get_closest_friendly_tile_from(self, point, excluding_points, deadline=None):
+        return self._get_closest_tile_from(point, excluding_points, deadline, lambda code, permanent: code == FRIENDLY_CODE)
+
+    def _get_closest_tile_from(self, point, excluding_points, deadline, matches):
+        # Walls are never reached by the search, but the source may be one, whose code is WALL_CODE
+        teams, permanent, height = self.ownership.teams, self.ownership.permanent, self.height
+        def condition(p):
+            cell = p[0] * height + p[1]
+            return matches(teams[cell], permanent[cell]) and ((not excluding_points) or (p not in excluding_points))
+        target = self.get_closest_point_from(point, condition, deadline=deadline)
+        if target: return self.get_tile_at(target)
         return None
 
-    def get_closest_enemy_tile_from(self, point, excluding_points):
-        if not self._position_to_tile_cache: self._create_position_to_tile_cache()
-        target = self.get_closest_point_from(point, lambda p: (p in self._position_to_tile_cache) and (self._position_to_tile_cache[p].is_enemy()) and ((not excluding_points) or (p not in excluding_points)))
-        if target: return self._position_to_tile_cache[target]
-        return None
-
-    def get_closest_capturable_tile_from(self, point, excluding_points):
-        if not self._position_to_tile_cache: self._create_position_to_tile_cache()
-        target = self.get_closest_point_from(point, lambda p: (p in self._position_to_tile_cache) and (not self._position_to_tile_cache[p].is_friendly()) and (not self._position_to_tile_cache[p].is_permanently_owned()) and ((not excluding_points) or (p not in excluding_points)))
-        if target: return self._position_to_tile_cache[target]
-        return None
-
-    def get_closest_friendly_tile_from(self, point, excluding_points):
-        if not self._position_to_tile_cache: self._create_position_to_tile_cache()
-        target = self.get_closest_point_from(point, lambda p: (p in self._position_to_tile_cache) and (self._position_to_tile_cache[p].is_friendly()) and ((not excluding_points) or (p not in excluding_points)))
-        if target: return self._position_to_tile_cache[target]
-        return None
-
-    def get_closest_friendly_nest_from(self, point, excluding_points):
+    def get_closest_friendly_nest_from(self, point, excluding_points, deadline=None):
         friendly_nests = self.team_to_nests_map[Team.FRIENDLY]
-        return self.get_closest_point_from(point, lambda p: (p in friendly_nests) and ((not excluding_points) or (p not in excluding_points)))
+        return self.get_closest_point_from(point, lambda p: (p in friendly_nests) and ((not excluding_points) or (p not in excluding_points)), deadline=deadline)
 
-    def get_closest_enemy_nest_from(self, point, excluding_points):
+    def get_closest_enemy_nest_from(self, point, excluding_points, deadline=None):
         enemy_nests = self.team_to_nests_map[Team.ENEMY]
-        return self.get_closest_point_from(point, lambda p: (p in enemy_nests) and ((not excluding_points) or (p not in excluding_points)))
-
-    def get_closest_point_from(self, source, condition):
-        queue = Queue()
-        visited = set()
-        queue.add(source)
-        visited.add(source)
-
-        while not (queue.is_empty()):
-            cursor = queue.poll()
-            neighbours = self.get_neighbours(cursor)
-
-            for direction in Direction.ORDERED_DIRECTIONS:
-                neighbour = neighbours[direction]
-                if not ((neighbour in visited) or self.is_wall(neighbour)):
-                    queue.add(neighbour)
-                    visited.add(neighbour)
-
-            if condition(cursor): return cursor
-
-        return None
+        return self.get_closest_point_from(point, lambda p: (p in enemy_nests) and ((not excluding_points) or (p not in excluding_points)), deadline=deadline)
+
+    def get_closest_point_from(self, source, condition, max_expansions=None, deadline=None):
+        self.check_turn()
+        return self._get_distance_field(source).get_closest_point(condition, max_expansions, deadline)
+
+    def get_next_points_towards_capturable_tiles(self, points):
+        self.check_turn()
+        engine = self._get_grid_engine()
+        distances = get_distances_from_any(engine, self.ownership.get_cells(self.ownership.get_capturable_mask()))
+        next_points = []
+        for point in points:
+            cell = engine.get_cell(point)
+            next_cell = cell
+            for neighbour in engine.neighbours[cell]:
+                if 0 <= distances[neighbour] < distances[next_cell]:
+                    next_cell = neighbour
+            next_points.append(engine.points[next_cell])
+        return next_points
+
+    def get_distance_field(self, source):
+        self.check_turn()
+        return self._get_distance_field(source).expand_all()
+
+    def _get_distance_field(self, source):
+        engine = self._get_grid_engine()
+        field = self._distance_field_cache.get(source)
+        if field is None or field.engine is not engine:
+            field = DistanceField(engine, source)
+            self._distance_field_cache[source] = field
+        return field
 
     def get_nest_positions(self):
         nests = [team_nests for team_nests in self.team_to_nests_map.values()]
@@ -182,21 +354,23 @@ class PlayerAPI:
         return self.team_to_nests_map[Team.ENEMY]
 
     def get_enemy_nest_clusters(self):
-        if not self._nest_clusters_cache: self._create_nest_clusters_cache()
+        if Team.ENEMY not in self._nest_clusters_cache: self._create_nest_clusters_cache(Team.ENEMY)
         return self._nest_clusters_cache[Team.ENEMY]
 
     def get_friendly_nest_clusters(self):
-        if not self._nest_clusters_cache: self._create_nest_clusters_cache()
+        if Team.FRIENDLY not in self._nest_clusters_cache: self._create_nest_clusters_cache(Team.FRIENDLY)
         return self._nest_clusters_cache[Team.FRIENDLY]
 
-    def _create_nest_clusters_cache(self):
+    def _create_nest_clusters_cache(self, team):
+        # Clusters only ever contain nests of a single team, so each team's clusters are cached separately
+        # and only dropped when that team's nests change
         environ_to_nests = self._get_extension_to_nests_map()
 
-        self._nest_clusters_cache = {Team.FRIENDLY: [], Team.ENEMY: []}
+        self._nest_clusters_cache[team] = []
 
         visited = set()
 
-        for team in self.team_to_nests_map.keys():
+        if team in self.team_to_nests_map:
             team_nests = self.team_to_nests_map[team]
             for nest in team_nests:
                 if not (nest in visited):
@@ -251,12 +425,13 @@ class PlayerAPI:
 
     def get_tiles_around(self, point):
         tile_neighbours = {}
-        if not self._position_to_tile_cache:
-            self._create_position_to_tile_cache()
+        walls, height = self.ownership.walls, self.height
         neighbours = self.get_neighbours(point)
         for direction in neighbours:
-            if neighbours[direction] in self._position_to_tile_cache:
-                tile_neighbours[direction] = self._position_to_tile_cache[neighbours[direction]]
+            neighbour = neighbours[direction]
+            cell = neighbour[0] * height + neighbour[1]
+            if not walls[cell]:
+                tile_neighbours[direction] = self._get_tile(cell)
         return tile_neighbours
 
     def get_enemy_tiles_around(self, point):
@@ -267,35 +442,56 @@ class PlayerAPI:
 
     def _get_team_tiles_around(self, point, team):
         belongs_to_team = []
-        for tile in self.get_tiles_around(point).values():
-            is_team = tile.is_friendly() if team == Team.FRIENDLY else tile.is_enemy()
-            if is_team: belongs_to_team.append(tile)
+        code, teams, height = TEAM_TO_CODE[team], self.ownership.teams, self.height
+        for neighbour in self.get_neighbours(point).values():
+            cell = neighbour[0] * height + neighbour[1]
+            if teams[cell] == code:
+                belongs_to_team.append(self._get_tile(cell))
         return belongs_to_team
 
     def get_neutral_tiles(self):
-        return self.team_to_tiles_map[Team.NEUTRAL]
+        return self._get_team_tiles(Team.NEUTRAL)
 
     def get_friendly_tiles(self):
-        return self.team_to_tiles_map[Team.FRIENDLY]
+        return self._get_team_tiles(Team.FRIENDLY)
 
     def get_enemy_tiles(self):
-        return self.team_to_tiles_map[Team.ENEMY]
+        return self._get_team_tiles(Team.ENEMY)
 
     def get_tiles(self):
-        tiles = [t for t in self.team_to_tiles_map.values()]
-        return recursively_flatten_list(tiles)
+        return self._get_tile_view(self.ownership.get_team_cells(Team.FRIENDLY) + self.ownership.get_team_cells(Team.ENEMY) +
+                                   self.ownership.get_team_cells(Team.NEUTRAL))
+
+    def _get_team_tiles(self, team):
+        tiles = self._team_to_tiles_cache.get(team)
+        if tiles is None:
+            tiles = self._team_to_tiles_cache[team] = self._get_tile_view(self.ownership.get_team_cells(team))
+        return tiles
+
+    def get_capturable_frontier_tiles(self):
+        return self._get_tile_view(self.ownership.get_cells(self.ownership.get_capturable_frontier_mask()))
+
+    def _get_tile_view(self, cells):
+        return TileView(cells, self._get_tile, self.ownership.points)
 
     def get_tile_at(self, point):
-        if not self._position_to_tile_cache: self._create_position_to_tile_cache()
-        if point in self._position_to_tile_cache: return self._position_to_tile_cache[point]
-        return None
+        if not self.is_within_bounds(point): return None
+        cell = point[0] * self.height + point[1]
+        if self.ownership.walls[cell]: return None
+        return self._get_tile(cell)
+
+    def _get_tile(self, cell):
+        tile = self._cell_to_tile_cache[cell]
+        if tile is None:
+            grid = self.ownership
+            tile = Tile(grid.points[cell], CODE_TO_TEAM[grid.teams[cell]], grid.permanent[cell] == 1)
+            self._cell_to_tile_cache[cell] = tile
+        return tile
 
     def get_position_to_tile_dict(self):
         if not self._position_to_tile_cache: self._create_position_to_tile_cache()
         return self._position_to_tile_cache
 
     def _create_position_to_tile_cache(self):
-        self._position_to_tile_cache = {}
-        for tiles in self.team_to_tiles_map.values():
-            for tile in tiles:
-                self._position_to_tile_cache[tile.position] = tile
\ No newline at end of file
+        points, walls = self.ownership.points, self.ownership.walls
+        self._position_to_tile_cache = {points[cell]: self._get_tile(cell) for cell in range(self.ownership.cell_count) if not walls[cell]}
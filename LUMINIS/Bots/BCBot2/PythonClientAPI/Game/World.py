@@ -1,13 +1,71 @@
 from PythonClientAPI.Game.PlayerAPI import PlayerAPI
-from PythonClientAPI.Game.Enums import TileType, Team, MoveType
-from PythonClientAPI.Game.Entities import Tile
+from PythonClientAPI.Game.Enums import MoveType
 
 class World:
     def __init__(self, tiles, friendlies, enemies, team_to_tiles_map, team_to_nests_map):
-        self._deduce_neutral_tiles(tiles, team_to_tiles_map)
         self._create_uuid_to_friendlies_map(friendlies)
         self.api = PlayerAPI(tiles, friendlies, enemies, team_to_tiles_map, team_to_nests_map)
 
+    def update(self, friendlies, enemies, team_to_tile_states, team_to_nests_map):
+        """
+        Brings this World to the state of a new turn, reusing everything that did not change since the last one.
+        Called by the client before do_move, so PlayerAI does not need to call it.
+
+        :param list friendlies: FriendlyUnits of the new turn
+        :param list enemies: EnemyUnits of the new turn
+        :param dict team_to_tile_states: Team.FRIENDLY and Team.ENEMY to lists of (x, y, permanent) owned tiles
+        :param dict team_to_nests_map: Team.FRIENDLY and Team.ENEMY to lists of nest positions
+        """
+        self._create_uuid_to_friendlies_map(friendlies)
+        self.api.update(friendlies, enemies, team_to_tile_states, team_to_nests_map)
+
+    def set_turn_token(self, token):
+        """
+        Ties the queries of this World to a turn. Called by the client before do_move, so PlayerAI does not need to call it.
+
+        :param TurnToken token: token of the turn about to be played
+        """
+        self.api.set_turn_token(token)
+
+    def set_turn_start(self, turn_start):
+        """
+        Sets the time at which the server asked for this turn's moves, from which deadline is measured.
+        Called by the client before do_move, so PlayerAI does not need to call it.
+
+        :param float turn_start: time.time() at which the server's MOVE message arrived
+        """
+        self.api.set_turn_start(turn_start)
+
+    @property
+    def deadline(self):
+        """
+        time.time() by which the moves of this turn must be sent: the moment the server's MOVE message arrived,
+        plus the maximum allowed response time. Decoding the game state already used part of it.
+
+        The path-finding, closest-point and planning methods take a deadline argument. Pass them this deadline
+        minus a safety margin to keep searching for as long as the turn allows and still send the moves in time.
+
+        :rtype: float
+        """
+        return self.api.get_deadline()
+
+    def time_remaining(self):
+        """
+        :return: seconds left until deadline, or 0 once it has passed
+        :rtype: float
+        """
+        return self.api.get_time_remaining()
+
+    def check_turn(self):
+        """
+        Stops do_move once its turn has been cancelled, which happens when it runs past the maximum allowed
+        response time. Path-finding and closest-point queries already call this, so it is only needed in long
+        loops of your own that do not use them.
+
+        :raises TurnCancelled: if the turn has been cancelled
+        """
+        self.api.check_turn()
+
     def get_unit(self, uuid):
         """
         Given its uuid, returns the corresponding unit.
@@ -38,12 +96,61 @@ class World:
         :return: whether or not the move will result in MOVE or REST
         :rtype: MoveType
         """
+        unit = self._get_living_unit(unit)
+
+        point = self.get_next_point_in_shortest_path(unit.position, position)
+        return self._set_next_move(unit, point)
+
+    def plan_moves(self, assignments, deadline=None):
+        """
+        Moves several units at once, one step each towards their target positions, so that they do not run
+        into each other. Use this method instead of move when many units travel through the same area.
+
+        Units are planned one after another, in the order given, over the next few turns. Each unit avoids
+        the cells that units planned before it will occupy, and never swaps places with one of them.
+        Distances come from the navigation cache when it is loaded. If deadline passes while planning, the
+        remaining units are moved as with move, or rest if the navigation cache is not loaded.
+
+        Note: only walls and the units in assignments are taken into account, not other units or nests.
+
+        :param assignments: dictionary, or list of pairs, from FriendlyUnit to target (x,y) position
+        :param float deadline: time.time() by which planning should stop, defaults to most of this turn's time
+        :return: dictionary whose keys are unit uuids and values are MoveType.MOVE or MoveType.REST
+        :rtype: dict with key str and value MoveType
+        """
+        pairs = list(assignments.items()) if isinstance(assignments, dict) else list(assignments)
+        units = [self._get_living_unit(unit) for unit, target in pairs]
+
+        points = self.api.plan_moves([(unit.position, target) for unit, (_, target) in zip(units, pairs)], deadline)
+        return {unit.uuid: self._set_next_move(unit, point) for unit, point in zip(units, points)}
+
+    def assign_units_to_targets(self, units, targets, cost="path", deadline=None):
+        """
+        Gives every unit its own target so that the total distance travelled is as small as possible, instead
+        of sending several units after the same closest target. The result can be passed to plan_moves.
+
+        With more units than targets some units get no target, and units that cannot reach any of the
+        remaining targets get none either. The assignment is optimal unless deadline passes while solving it,
+        in which case the closest free target is given to each unit in turn, shortest distances first.
+
+        :param list units: FriendlyUnits to assign
+        :param list targets: distinct (x,y) points, or Tiles, to assign the units to
+        :param str cost: "path" to measure shortest path distances, or "taxicab" for taxi-cab distances
+        :param float deadline: time.time() by which solving should stop, defaults to most of this turn's time
+        :return: dictionary from FriendlyUnit to the element of targets it is assigned to
+        :rtype: dict
+        """
+        positions = [getattr(target, 'position', target) for target in targets]
+        indices = self.api.assign_units_to_targets([unit.position for unit in units], positions, cost, deadline)
+        return {unit: targets[index] for unit, index in zip(units, indices) if index >= 0}
+
+    def _get_living_unit(self, unit):
         if unit.uuid in self.uuid_to_friendlies_map:
-            unit = self.uuid_to_friendlies_map[unit.uuid]
+            return self.uuid_to_friendlies_map[unit.uuid]
         else:
             raise Exception("Asked to move unit that is no longer in game!")
 
-        point = self.get_next_point_in_shortest_path(unit.position, position)
+    def _set_next_move(self, unit, point):
         unit._next_move_target = point
         unit._next_move_type = MoveType.REST if point == unit.position else MoveType.MOVE
 
@@ -54,25 +161,6 @@ class World:
         for unit in friendlies:
             self.uuid_to_friendlies_map[unit.uuid] = unit
 
-    def _deduce_neutral_tiles(self, tiles, team_to_tiles_map):
-        friendly_tiles = []
-        enemy_tiles = []
-
-        for tile_list in team_to_tiles_map.values():
-            for tile in tile_list:
-                if tile.is_friendly(): friendly_tiles.append(tile.position)
-                elif tile.is_enemy(): enemy_tiles.append(tile.position)
-
-        width = len(tiles)
-        height = len(tiles[0])
-        neutral_tiles = []
-        for x in range(0, width):
-            for y in range(0, height):
-                if not (tiles[x][y] == TileType.WALL) and not ((x, y) in friendly_tiles or (x, y) in enemy_tiles):
-                    neutral_tiles.append(Tile((x, y), Team.NEUTRAL, False))
-
-        team_to_tiles_map[Team.NEUTRAL] = neutral_tiles
-
     def get_width(self):
         """
         :return: map width
@@ -96,6 +184,18 @@ class World:
         """
         return self.api.get_taxicab_distance(start, end)
 
+    def get_taxicab_distance_matrix(self, sources, targets):
+        """
+        Computes get_taxicab_distance for every pair of sources and targets at once, which is much faster
+        than calling it in a loop when ranking many units against many targets.
+
+        :param list sources: list of (x,y) points
+        :param list targets: list of (x,y) points
+        :return: matrix whose entry [i][j] is the shortest taxi-cab distance between sources[i] and targets[j]
+        :rtype: list of list of int
+        """
+        return self.api.get_taxicab_distance_matrix(sources, targets)
+
     def is_within_bounds(self, point):
         """
         :param (int,int) point: point tuple
@@ -132,13 +232,16 @@ class World:
 
 
 
-    def get_shortest_path(self, start, end, avoid):
+    def get_shortest_path(self, start, end, avoid, max_expansions=None, deadline=None):
         """
         Returns the shortest path between start and end.
         If avoid is not None, the method will return the shortest path
         between start and end that does not visit any points in avoid.
 
-        If there is no path, None is returned.
+        If there is no path, None is returned. Points separated by walls are detected without searching.
+
+        If max_expansions or deadline is given and the search runs out of budget before reaching end,
+        the path to the explored point closest to end is returned instead. Its last element is then not end.
 
         Note: The path-finding algorithm may come at a cost of performance.
         For a quicker path look-up alternative, use get_next_point_shortest_path.
@@ -146,10 +249,23 @@ class World:
         :param (int,int) start: source
         :param (int,int) end: target
         :param set avoid: a set of (x,y) tuples to exclude from path-finding
+        :param int max_expansions: maximum number of points the search may expand
+        :param float deadline: time.time() at which the search should stop
         :return: list of points representing the shortest path such that the first element in the list is the next point in the path, or None.
         :rtype: list of point
         """
-        return self.api.get_shortest_path(start, end, avoid)
+        return self.api.get_shortest_path(start, end, avoid, max_expansions, deadline)
+
+    def are_connected(self, start, end):
+        """
+        Answered in constant time from connected-component labels of the map.
+
+        :param (int,int) start: source
+        :param (int,int) end: target
+        :return: True iff there is a path between start and end, taking into account walls only
+        :rtype: bool
+        """
+        return self.api.are_connected(start, end)
 
     def get_next_point_in_shortest_path(self, start, end):
         """
@@ -177,92 +293,145 @@ class World:
         """
         return self.api.get_shortest_path_distance(start, end)
 
-    def get_closest_enemy_from(self, point, excluding_units):
+    def get_path_distance_matrix(self, sources, targets):
+        """
+        Computes get_shortest_path_distance for every pair of sources and targets at once. With a navigation
+        cache loaded each row is read from the cache in one go; otherwise one breadth-first search is run per
+        source or per target, whichever there are fewer of, instead of one search per pair.
+
+        :param list sources: list of (x,y) points
+        :param list targets: list of (x,y) points
+        :return: matrix whose entry [i][j] is the shortest path distance from sources[i] to targets[j], or 0 if there is no path
+        :rtype: list of list of int
+        """
+        return self.api.get_path_distance_matrix(sources, targets)
+
+    def get_closest_enemy_from(self, point, excluding_units, deadline=None):
         """
         Returns the closest EnemyUnit from point, excluding any of the ones in excluding_units.
 
         :param (int,int) point: point tuple
         :param set excluding_units: a set of EnemyUnits to exclude from search
+        :param float deadline: time.time() at which to give up and return None
         :return: closest EnemyUnit from point
         :rtype: EnemyUnit
         """
-        return self.api.get_closest_enemy_from(point, excluding_units)
+        return self.api.get_closest_enemy_from(point, excluding_units, deadline)
 
-    def get_closest_friendly_from(self, point, excluding_units):
+    def get_closest_friendly_from(self, point, excluding_units, deadline=None):
         """
         Returns the closest FriendlyUnit from point, excluding any of the ones in excluding_units.
 
         :param (int,int) point: point tuple
         :param set excluding_units: a set of FriendlyUnit to exclude from search
+        :param float deadline: time.time() at which to give up and return None
         :return: closest FriendlyUnit from point
         :rtype: FriendlyUnit
         """
-        return self.api.get_closest_friendly_from(point, excluding_units)
+        return self.api.get_closest_friendly_from(point, excluding_units, deadline)
 
-    def get_closest_neutral_tile_from(self, point, excluding_points):
+    def get_closest_neutral_tile_from(self, point, excluding_points, deadline=None):
         """
         :param (int,int) point: source
         :param set excluding_points: points to exclude from search
+        :param float deadline: time.time() at which to give up and return None
         :return: Closest neutral Tile from point, excluding any of the ones whose positions are in excluding_points
         :rtype: Tile
         """
-        return self.api.get_closest_neutral_tile_from(point, excluding_points)
+        return self.api.get_closest_neutral_tile_from(point, excluding_points, deadline)
 
-    def get_closest_enemy_tile_from(self, point, excluding_points):
+    def get_closest_enemy_tile_from(self, point, excluding_points, deadline=None):
         """
         :param (int,int) point: source
         :param set excluding_points: points to exclude from search
+        :param float deadline: time.time() at which to give up and return None
         :return: Closest enemy Tile from point, excluding any of the ones whose positions are in excluding_points
         :rtype: Tile
         """
-        return self.api.get_closest_enemy_tile_from(point, excluding_points)
+        return self.api.get_closest_enemy_tile_from(point, excluding_points, deadline)
 
-    def get_closest_capturable_tile_from(self, point, excluding_points):
+    def get_closest_capturable_tile_from(self, point, excluding_points, deadline=None):
         """
         :param (int,int) point: source
         :param set excluding_points: points to exclude from search
+        :param float deadline: time.time() at which to give up and return None
         :return: Closest non-permanent enemy or neutral Tile from point, excluding any of the ones whose positions are in excluding_points
         :rtype: Tile
         """
-        return self.api.get_closest_capturable_tile_from(point, excluding_points)
+        return self.api.get_closest_capturable_tile_from(point, excluding_points, deadline)
 
-    def get_closest_friendly_tile_from(self, point, excluding_points):
+    def get_closest_friendly_tile_from(self, point, excluding_points, deadline=None):
         """
         :param (int,int) point: source
         :param set excluding_points: points to exclude from search
+        :param float deadline: time.time() at which to give up and return None
         :return: Closest friendly Tile from point, excluding any of the ones whose positions are in excluding_points
         :rtype: Tile
         """
-        return self.api.get_closest_friendly_tile_from(point, excluding_points)
+        return self.api.get_closest_friendly_tile_from(point, excluding_points, deadline)
 
-    def get_closest_friendly_nest_from(self, point, excluding_points):
+    def get_closest_friendly_nest_from(self, point, excluding_points, deadline=None):
         """
         :param (int,int) point: source
         :param set excluding_points: points to exclude from search
+        :param float deadline: time.time() at which to give up and return None
         :return: Closest friendly nest location from point, excluding any of the ones whose positions are in excluding_points
         :rtype: Tile
         """
-        return self.api.get_closest_friendly_nest_from(point, excluding_points)
+        return self.api.get_closest_friendly_nest_from(point, excluding_points, deadline)
 
-    def get_closest_enemy_nest_from(self, point, excluding_points):
+    def get_closest_enemy_nest_from(self, point, excluding_points, deadline=None):
         """
         :param (int,int) point: source
         :param set excluding_points: points to exclude from search
+        :param float deadline: time.time() at which to give up and return None
         :return: Closest enemy nest location from point, excluding any of the ones whose positions are in excluding_points
         :rtype: Tile
         """
-        return self.api.get_closest_enemy_nest_from(point, excluding_points)
+        return self.api.get_closest_enemy_nest_from(point, excluding_points, deadline)
 
-    def get_closest_point_from(self, source, condition):
+    def get_closest_point_from(self, source, condition, max_expansions=None, deadline=None):
         """
-        Given source, looks for the closest point from source that satisfies condition
+        Given source, looks for the closest point from source that satisfies condition.
+        If max_expansions points have been tested or deadline has passed without a match, returns None.
 
         :param (int,int) source: source
         :param function condition: a function that takes a single point as an argument and evaluates to True if it matches the search criteria
+        :param int max_expansions: maximum number of points to test
+        :param float deadline: time.time() at which the search should stop
         :return: the closest point from source for which condition evaluates to True
         :rtype: (int,int)
         """
-        return self.api.get_closest_point_from(source, condition)
+        return self.api.get_closest_point_from(source, condition, max_expansions, deadline)
+
+    def get_next_points_towards_capturable_tiles(self, points):
+        """
+        For each point, returns the next point on a shortest path to its closest capturable tile, that is
+        the closest neutral or enemy tile that is not permanently owned. A single search from every capturable
+        tile at once answers all points, so this is much cheaper than a get_closest_capturable_tile_from per point.
+
+        :param list points: list of (x,y) points
+        :return: next point for each point, or the point itself if it is capturable or no capturable tile can be reached
+        :rtype: list of (int,int)
+        """
+        return self.api.get_next_points_towards_capturable_tiles(points)
+
+    def get_distance_field(self, source):
+        """
+        Runs a single breadth-first search from source over the whole map and returns it as a DistanceField,
+        from which any number of distance, path and closest-point queries can be answered without searching again.
+        Fields are cached for the rest of the turn, and get_closest_point_from and the get_closest_*_from
+        methods reuse the field of their source point.
+
+        Use field.get_distance(point), field.get_path(point), field.get_next_point(point) and
+        field.get_closest_point(condition), or read field.distances and field.directions, indexed by
+        x * height + y, directly.
+
+        :param (int,int) source: source
+        :return: distance field from source, taking into account walls only
+        :rtype: DistanceField
+        """
+        return self.api.get_distance_field(source)
 
     def get_nest_positions(self):
         """
@@ -342,32 +511,63 @@ class World:
 
     def get_neutral_tiles(self):
         """
-        :return: a list of all neutral Tiles
-        :rtype: list of Tile
+        :return: a list of all neutral Tiles, ordered by x then y. Tiles are created as they are accessed.
+        :rtype: TileView
         """
         return self.api.get_neutral_tiles()
 
     def get_friendly_tiles(self):
         """
-        :return: a list of all friendly Tiles
-        :rtype: list of Tile
+        :return: a list of all friendly Tiles, ordered by x then y. Tiles are created as they are accessed.
+        :rtype: TileView
         """
         return self.api.get_friendly_tiles()
 
     def get_enemy_tiles(self):
         """
-        :return: a list of all enemy Tiles
-        :rtype: list of Tile
+        :return: a list of all enemy Tiles, ordered by x then y. Tiles are created as they are accessed.
+        :rtype: TileView
         """
         return self.api.get_enemy_tiles()
 
     def get_tiles(self):
         """
-        :return: a list of all Tiles
-        :rtype: list of Tile
+        :return: a list of all Tiles: friendly, then enemy, then neutral. Tiles are created as they are accessed.
+        :rtype: TileView
         """
         return self.api.get_tiles()
 
+    def get_capturable_frontier_tiles(self):
+        """
+        :return: a list of all neutral and non-permanent enemy Tiles next to a friendly Tile, ordered by x then y
+        :rtype: TileView
+        """
+        return self.api.get_capturable_frontier_tiles()
+
+    def get_topology(self):
+        """
+        Returns the parts of the map that never change during a match: walls, borders, torus neighbours and
+        connected components, as flat tables indexed by x * height + y. The same object is shared by every turn.
+
+        :return: topology of the current map
+        :rtype: MapTopology
+        """
+        return self.api.get_topology()
+
+    def get_ownership_grid(self):
+        """
+        Returns the ownership of the whole board as flat arrays indexed by x * height + y.
+
+        For whole-board features, combine grid.get_team_mask(team), grid.get_permanent_mask(), grid.walls_mask
+        and grid.get_adjacent_mask(mask) with &, | and ~, then turn the result into points with grid.get_points(mask).
+        The same grid is kept for the whole match, but each turn replaces its teams and permanent arrays with new
+        ones, so read them from the grid every turn rather than keeping them, or masks made from them, across turns.
+
+        :return: ownership grid of the current turn
+        :rtype: OwnershipGrid
+        """
+        return self.api.ownership
+
     def get_tile_at(self, point):
         """
         :param point: (x,y) tuple
@@ -0,0 +1,177 @@
+import heapq
+import time
+from operator import add
+
+# Above this estimate of n * n * m steps the auction is tried instead of the Hungarian method
+HUNGARIAN_MAX_WORK = 1000000
+# The auction only beats the Hungarian method when few rows compete for each column; on square problems
+# it spends most of its time in bidding wars
+AUCTION_MIN_COLUMNS_PER_ROW = 4
+# Bids made between two checks of the deadline
+AUCTION_CHECK_INTERVAL = 64
+
+
+def assign(costs, deadline=None):
+    """
+    Solves the minimum-cost assignment of rows to distinct columns.
+
+    Problems are solved exactly with the Hungarian method, or with the auction algorithm, also exact on integer
+    costs, when they are large and have many more columns than rows. Either way, only the cheapest columns of each row are considered:
+    with n rows, some optimal assignment gives every row one of its n cheapest columns. If deadline passes
+    before the exact solution is found, or has already passed, the greedy assignment is returned instead.
+
+    :param list costs: n rows of m integer costs
+    :param float deadline: time.time() after which to fall back to the greedy assignment
+    :return: column assigned to each row, or -1 for rows left over when there are more rows than columns
+    :rtype: list of int
+    """
+    row_count = len(costs)
+    if row_count == 0: return []
+    column_count = len(costs[0])
+    if column_count == 0: return [-1] * row_count
+    if deadline is not None and time.time() > deadline: return greedy(costs)
+
+    if row_count > column_count:
+        # Assign the columns to rows instead, so that every solver sees at most as many rows as columns
+        rows = assign([list(column) for column in zip(*costs)], deadline)
+        assignment = [-1] * row_count
+        for column, row in enumerate(rows):
+            assignment[row] = column
+        return assignment
+
+    columns = list(range(column_count))
+    if column_count > row_count:
+        candidates = set()
+        for row in costs:
+            candidates.update(heapq.nsmallest(row_count, columns, key=row.__getitem__))
+        columns = sorted(candidates)
+    reduced = [[row[column] for column in columns] for row in costs]
+
+    if row_count * row_count * len(columns) > HUNGARIAN_MAX_WORK and len(columns) >= AUCTION_MIN_COLUMNS_PER_ROW * row_count:
+        solve = auction
+    else:
+        solve = hungarian
+    assignment = solve(reduced, deadline)
+    if assignment is None: return greedy(costs)
+    return [columns[column] for column in assignment]
+
+
+def hungarian(costs, deadline=None):
+    """
+    Hungarian method with potentials, in O(n * n * m).
+
+    :param list costs: n rows of m costs, with n <= m
+    :param float deadline: time.time() after which to give up
+    :return: column assigned to each row, or None if deadline passed
+    :rtype: list of int
+    """
+    row_count, column_count = len(costs), len(costs[0])
+    infinity = float('inf')
+    # 1-based: column 0 is a virtual column that holds the row being inserted
+    row_potentials = [0] * (row_count + 1)
+    column_potentials = [0] * (column_count + 1)
+    owners = [0] * (column_count + 1)
+    previous = [0] * (column_count + 1)
+
+    for row in range(1, row_count + 1):
+        if deadline is not None and time.time() > deadline: return None
+        owners[0] = row
+        column = 0
+        slack = [infinity] * (column_count + 1)
+        used = [False] * (column_count + 1)
+        while True:
+            used[column] = True
+            owner = owners[column]
+            owner_costs, owner_potential = costs[owner - 1], row_potentials[owner]
+            delta, next_column = infinity, 0
+            for j in range(1, column_count + 1):
+                if used[j]: continue
+                reduced = owner_costs[j - 1] - owner_potential - column_potentials[j]
+                if reduced < slack[j]:
+                    slack[j] = reduced
+                    previous[j] = column
+                if slack[j] < delta:
+                    delta, next_column = slack[j], j
+            for j in range(column_count + 1):
+                if used[j]:
+                    row_potentials[owners[j]] += delta
+                    column_potentials[j] -= delta
+                else:
+                    slack[j] -= delta
+            column = next_column
+            if owners[column] == 0: break
+        # Shift the assignments along the augmenting path
+        while column != 0:
+            previous_column = previous[column]
+            owners[column] = owners[previous_column]
+            column = previous_column
+
+    assignment = [-1] * row_count
+    for column in range(1, column_count + 1):
+        if owners[column]:
+            assignment[owners[column] - 1] = column - 1
+    return assignment
+
+
+def auction(costs, deadline=None):
+    """
+    Forward auction algorithm. Rows bid for their cheapest column, raising its price by the margin over their
+    second choice, until every row holds a column.
+
+    Costs are scaled by n + 1 and the bidding increment is 1, which makes the result optimal for integer
+    costs. Prices start at zero, so columns that are never bid on stay the cheapest, which keeps the result
+    optimal with more columns than rows.
+
+    :param list costs: n rows of m integer costs, with n <= m
+    :param float deadline: time.time() after which to give up
+    :return: column assigned to each row, or None if deadline passed
+    :rtype: list of int
+    """
+    row_count, column_count = len(costs), len(costs[0])
+    infinity = float('inf')
+    scale = row_count + 1
+    scaled_costs = [[cost * scale for cost in row] for row in costs]
+    prices = [0] * column_count
+    owners = [-1] * column_count
+    assignment = [-1] * row_count
+    unassigned = list(range(row_count - 1, -1, -1))
+
+    bids = 0
+    while unassigned:
+        if deadline is not None and bids % AUCTION_CHECK_INTERVAL == 0 and time.time() > deadline: return None
+        bids += 1
+        row = unassigned.pop()
+        values = list(map(add, scaled_costs[row], prices))
+        best = min(values)
+        column = values.index(best)
+        if column_count > 1:
+            values[column] = infinity
+            prices[column] += min(values) - best + 1
+        owner = owners[column]
+        if owner >= 0:
+            assignment[owner] = -1
+            unassigned.append(owner)
+        owners[column] = row
+        assignment[row] = column
+    return assignment
+
+
+def greedy(costs):
+    """
+    Repeatedly assigns the cheapest remaining (row, column) pair.
+
+    :param list costs: n rows of m costs
+    :return: column assigned to each row, or -1 for rows left over when there are more rows than columns
+    :rtype: list of int
+    """
+    pairs = sorted((cost, row, column) for row, row_costs in enumerate(costs) for column, cost in enumerate(row_costs))
+    assignment = [-1] * len(costs)
+    taken = set()
+    remaining = min(len(costs), len(costs[0]) if costs else 0)
+    for cost, row, column in pairs:
+        if remaining == 0: break
+        if assignment[row] >= 0 or column in taken: continue
+        assignment[row] = column
+        taken.add(column)
+        remaining -= 1
+    return assignment
@@ -0,0 +1,188 @@
+import heapq
+import time
+
+DEFAULT_WINDOW = 8
+# Expansions allowed for a single unit, per turn of the window
+EXPANSIONS_PER_STEP = 40
+
+class CooperativePlanner:
+    """
+    Windowed cooperative A*.
+
+    Units are planned one after another over the next `window` turns in space-time (cell, turn) states.
+    Every planned path is written to a reservation table, and units planned later may neither enter a
+    reserved (cell, turn) nor swap cells with an earlier unit, so the resulting moves do not collide.
+    The start cells of all units are reserved for the first two turns before any unit is planned, so that
+    a unit is never moved into a cell whose occupant has not been planned yet.
+    A unit that reaches its target before the end of the window parks there.
+    """
+    def __init__(self, engine, window=DEFAULT_WINDOW):
+        self.engine = engine
+        self.window = window
+        self.reserved = set()
+        self.swaps = set()
+        self.parked = {}
+
+    def reserve_starts(self, starts):
+        """
+        Reserves the start cells of all the units that will be planned, until each of them is planned.
+
+        :param list starts: positions of the units, as (int,int) points
+        """
+        for start in starts:
+            start_cell = self.engine.get_cell(start)
+            self.reserved.add((start_cell, 0))
+            self.reserved.add((start_cell, 1))
+
+    def plan(self, start, target, heuristic):
+        """
+        Plans one unit against the current reservations and reserves its path.
+
+        :param (int,int) start: unit position
+        :param (int,int) target: where the unit is headed
+        :param function heuristic: takes a cell id and returns an estimate of its distance to target
+        :return: the point the unit should move to this turn, which is start if it should rest
+        :rtype: (int,int)
+        """
+        engine = self.engine
+        start_cell = engine.get_cell(start)
+        target_cell = engine.get_cell(target)
+        # The unit's own start reservation, if any, is replaced by its path
+        self.reserved.discard((start_cell, 0))
+        self.reserved.discard((start_cell, 1))
+
+        cells = self._search(start_cell, target_cell, heuristic)
+        if cells is not None:
+            self._reserve(cells, True)
+        else:
+            cells = self._get_resting_cells(start_cell)
+            self._reserve(cells, False)
+
+        return engine.points[cells[1]] if len(cells) > 1 else start
+
+    def reserve_move(self, start, next_point):
+        """
+        Reserves a move that was not planned by this planner, or rest instead if it would collide.
+
+        :param (int,int) start: unit position
+        :param (int,int) next_point: the point the unit would move to this turn
+        :return: next_point if it was free, otherwise start
+        :rtype: (int,int)
+        """
+        start_cell = self.engine.get_cell(start)
+        next_cell = self.engine.get_cell(next_point)
+        self.reserved.discard((start_cell, 0))
+        self.reserved.discard((start_cell, 1))
+        if next_cell == start_cell or not self._is_free(next_cell, 1) or (start_cell, next_cell, 0) in self.swaps:
+            self._reserve(self._get_resting_cells(start_cell), False)
+            return start
+        self._reserve([start_cell, next_cell], False)
+        return next_point
+
+    def _search(self, start_cell, target_cell, heuristic):
+        window = self.window
+        neighbours, walls = self.engine.neighbours, self.engine.walls
+        reserved, swaps, parked = self.reserved, self.swaps, self.parked
+
+        heuristics = {}
+        def h(cell):
+            value = heuristics.get(cell)
+            if value is None:
+                value = heuristics[cell] = heuristic(cell)
+            return value
+
+        start = (start_cell, 0)
+        costs = {start: 0}
+        parents = {start: None}
+        closed = set()
+        # Ties on f are broken towards later turns, so a search with an exact heuristic dives straight down
+        heap = [(h(start_cell), 0, 0, start)]
+        count = 1
+        max_expansions = EXPANSIONS_PER_STEP * window
+        while heap and len(closed) < max_expansions:
+            state = heapq.heappop(heap)[3]
+            if state in closed:
+                continue
+            closed.add(state)
+
+            cell, turn = state
+            if turn == window or (cell == target_cell and self._can_park(cell, turn)):
+                return self._get_cells(parents, state)
+
+            next_turn = turn + 1
+            cost = costs[state] + 1
+            for next_cell in neighbours[cell] + (cell,):
+                if walls[next_cell] or (next_cell, next_turn) in reserved or parked.get(next_cell, next_turn + 1) <= next_turn:
+                    continue
+                if next_cell != cell and (cell, next_cell, turn) in swaps:
+                    continue
+                next_state = (next_cell, next_turn)
+                if next_state not in costs or cost < costs[next_state]:
+                    costs[next_state] = cost
+                    parents[next_state] = state
+                    heapq.heappush(heap, (cost + h(next_cell), -next_turn, count, next_state))
+                    count += 1
+
+        return None
+
+    def _is_free(self, cell, turn):
+        return (cell, turn) not in self.reserved and self.parked.get(cell, turn + 1) > turn
+
+    def _get_resting_cells(self, start_cell):
+        # Rests for as long as no other unit has claimed the start cell, which is free at least for the next
+        # turn since it was reserved before planning started
+        cells = [start_cell, start_cell]
+        while len(cells) <= self.window and self._is_free(start_cell, len(cells)):
+            cells.append(start_cell)
+        return cells
+
+    def _can_park(self, cell, turn):
+        return all((cell, later) not in self.reserved for later in range(turn + 1, self.window + 1))
+
+    def _get_cells(self, parents, state):
+        cells = []
+        while state is not None:
+            cells.append(state[0])
+            state = parents[state]
+        cells.reverse()
+        return cells
+
+    def _reserve(self, cells, park):
+        for turn, cell in enumerate(cells):
+            self.reserved.add((cell, turn))
+            if turn + 1 < len(cells):
+                self.swaps.add((cells[turn + 1], cell, turn))
+
+        last_turn = len(cells) - 1
+        if park and last_turn < self.window:
+            self.parked[cells[-1]] = last_turn
+
+
+def plan_moves(engine, starts_and_targets, heuristic_for, deadline=None, fallback=None, window=DEFAULT_WINDOW):
+    """
+    Plans one move for every (start, target) pair with a single CooperativePlanner, in the order given.
+
+    :param GridEngine engine: grid to plan on
+    :param list starts_and_targets: list of ((int,int) start, (int,int) target) pairs
+    :param function heuristic_for: takes a target point and returns a heuristic function on cell ids
+    :param float deadline: time.time() after which the remaining pairs are not planned cooperatively
+    :param function fallback: takes (start, target) and returns the next point, for pairs left after the deadline,
+        which is replaced by start if it collides with a planned move
+    :param int window: number of turns planned ahead
+    :return: list of next points, in the order of starts_and_targets
+    :rtype: list of (int,int)
+    :raises TurnCancelled: if the turn token of engine is cancelled while planning
+    """
+    planner = CooperativePlanner(engine, window)
+    planner.reserve_starts([start for start, _ in starts_and_targets])
+    heuristics = {}
+    next_points = []
+    for start, target in starts_and_targets:
+        if engine.turn_token is not None: engine.turn_token.check()
+        if deadline is not None and time.time() > deadline:
+            next_points.append(planner.reserve_move(start, fallback(start, target)) if fallback else start)
+            continue
+        if target not in heuristics:
+            heuristics[target] = heuristic_for(target)
+        next_points.append(planner.plan(start, target, heuristics[target]))
+    return next_points
@@ -0,0 +1,151 @@
+import heapq
+import time
+
+from PythonClientAPI.Game.MapTopology import get_map_topology
+from PythonClientAPI.Game.PointUtils import mod_taxi_cab_distance_field
+
+# Searches only look at the clock and the turn token once every this many expansions
+DEADLINE_CHECK_INTERVAL = 64
+
+class GridEngine:
+    """
+    Path-finding on integer cell ids (x * height + y) instead of point tuples.
+
+    Neighbours are looked up in the MapTopology table, in Direction.ORDERED_DIRECTIONS order, walls live in a flat
+    bitmap, and g-scores and parents are flat lists indexed by cell id. Searches expand cells in exactly the same
+    order as the tuple-based A*, so they return the same paths.
+
+    :ivar TurnToken turn_token: token of the turn the engine is searching for, checked during long searches, or None
+    """
+    def __init__(self, tiles, ordered_directions=None):
+        self.topology = topology = get_map_topology(tiles, ordered_directions)
+        self.width = topology.width
+        self.height = topology.height
+        self.ordered_directions = list(topology.ordered_directions)
+        self.cell_count = topology.cell_count
+        self.walls = topology.walls
+        self.points = topology.points
+        self.xs = topology.xs
+        self.ys = topology.ys
+        self.neighbours = topology.neighbours
+        self.turn_token = None
+
+    def get_cell(self, point):
+        return point[0] * self.height + point[1]
+
+    def get_components(self):
+        """
+        :return: component label of every cell id, or -1 for walls
+        :rtype: tuple of int
+        """
+        return self.topology.components
+
+    def are_connected(self, start, end):
+        """
+        :return: True iff there is a path from start to end that only goes around walls
+        :rtype: bool
+        """
+        return self.topology.are_connected(start, end)
+
+    def get_heuristic(self, end):
+        """
+        :param int end: target cell
+        :return: list of taxi-cab distances on the torus from every cell to end
+        :rtype: list of int
+        """
+        return mod_taxi_cab_distance_field(self.points[end], self.width, self.height)
+
+    def get_blocked_cells(self, avoid):
+        """
+        :param avoid: points that may not be entered, or None
+        :return: bitmap of walls and avoided cells
+        :rtype: bytearray
+        """
+        if not avoid:
+            return self.walls
+        blocked = bytearray(self.walls)
+        width, height = self.width, self.height
+        for point in avoid:
+            if 0 <= point[0] < width and 0 <= point[1] < height:
+                blocked[point[0] * height + point[1]] = 1
+        return blocked
+
+    def get_shortest_path(self, start, end, avoid=None, max_expansions=None, deadline=None):
+        """
+        A* search from start to end. Same contract as PlayerAPI.get_shortest_path.
+
+        Points that are not connected to each other are answered right away from the component labels.
+        If max_expansions cells have been expanded or deadline has passed before end is reached, the search
+        stops and returns the path to the explored point closest to end, which does not end at end.
+
+        :param (int,int) start: source
+        :param (int,int) end: target
+        :param avoid: points to exclude from path-finding, or None
+        :param int max_expansions: maximum number of cells to expand
+        :param float deadline: time.time() at which to stop searching
+        :return: list of points from the step after start up to end, a partial path, or None
+        :raises TurnCancelled: if turn_token is cancelled during the search
+        """
+        if start == end: return [end]
+        start_cell = self.get_cell(start)
+        end_cell = self.get_cell(end)
+        if self.walls[start_cell] or self.walls[end_cell]: return None
+        if not self.are_connected(start, end): return None
+
+        blocked = self.get_blocked_cells(avoid)
+        heuristic = self.get_heuristic(end_cell)
+        neighbours = self.neighbours
+        costs = [-1] * self.cell_count
+        parents = [-1] * self.cell_count
+        costs[start_cell] = 0
+
+        heap = [(0, 0, start_cell)]
+        heappush, heappop = heapq.heappush, heapq.heappop
+        count = 1
+        expansions = 0
+        closest_cell = start_cell
+        token = self.turn_token
+        while heap:
+            if max_expansions is not None and expansions >= max_expansions:
+                return self.get_partial_path(parents, start_cell, closest_cell)
+            if expansions % DEADLINE_CHECK_INTERVAL == 0:
+                if token is not None: token.check()
+                if deadline is not None and time.time() > deadline:
+                    return self.get_partial_path(parents, start_cell, closest_cell)
+            expansions += 1
+            current = heappop(heap)[2]
+            if heuristic[current] < heuristic[closest_cell]:
+                closest_cell = current
+
+            cost = costs[current] + 1
+            for neighbour in neighbours[current]:
+                if blocked[neighbour]:
+                    continue
+                neighbour_cost = costs[neighbour]
+                if neighbour_cost < 0 or cost < neighbour_cost:
+                    costs[neighbour] = cost
+                    heappush(heap, (cost + heuristic[neighbour], count, neighbour))
+                    count += 1
+                    parents[neighbour] = current
+
+            if current == end_cell:
+                return self.get_path(parents, start_cell, end_cell)
+
+        return None
+
+    def get_partial_path(self, parents, start_cell, closest_cell):
+        if closest_cell == start_cell: return None
+        return self.get_path(parents, start_cell, closest_cell)
+
+    def get_path(self, parents, start_cell, end_cell):
+        """
+        :return: list of points from the step after start_cell up to end_cell, following parents
+        """
+        points = self.points
+        path = []
+        cursor = end_cell
+        while cursor != start_cell:
+            path.append(points[cursor])
+            cursor = parents[cursor]
+        path.reverse()
+        return path
@@ -0,0 +1,269 @@
+from unittest import TestCase
+import json
+import random
+import threading
+import time
+import unittest
+
+import PythonClientAPI.Communication.ClientHandlerProtocol as ClientHandlerProtocolModule
+import PythonClientAPI.Communication.CommunicatorConstants as cc
+import PythonClientAPI.Configurator.Constants as constants
+import PythonClientAPI.Game.JSON as JSON
+from PythonClientAPI.Communication.AIProcessExecutor import AIProcessExecutor
+from PythonClientAPI.Communication.ClientHandlerProtocol import ClientHandlerProtocol
+from PythonClientAPI.Communication.Signals import Signals
+from PythonClientAPI.Game.Enums import TileType, Direction
+from PythonClientAPI.Game.GameState import PlayerTurnActionInfo
+from PythonClientAPI.Game.TurnToken import TurnCancelled
+from PythonClientAPI.Test.WorldUpdateTest import FRIENDLY_UUID, random_game_state
+
+MAXIMUM_ALLOWED_RESPONSE_TIME = 200
+
+
+class ScriptedAI:
+
+    def __init__(self, do_move):
+        self.do_move = do_move
+
+
+class StallingAI:
+
+    def do_move(self, world, friendly_units, enemy_units):
+        if not friendly_units:
+            time.sleep(10)
+        for unit in friendly_units:
+            world.move(unit, world.get_neighbours(unit.position)[Direction.EAST])
+
+
+class FakeChannelHandler:
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.sent = []
+        self.last_message_time = None
+
+    def receive_message(self):
+        return self.messages.pop(0)
+
+    def send_message(self, message):
+        self.sent.append(message)
+
+
+class TestClientHandlerProtocol(TestCase):
+
+    def setUp(self):
+        self.maximum_allowed_response_time = cc.MAXIMUM_ALLOWED_RESPONSE_TIME
+        constants.LOCAL_PLAYER_UUID = FRIENDLY_UUID
+        self.generator = random.Random(5)
+        self.tiles = [[TileType.TILE for y in range(7)] for x in range(7)]
+        self.protocols = []
+
+    def tearDown(self):
+        for protocol in self.protocols:
+            protocol.get_ai_executor().stop()
+        cc.MAXIMUM_ALLOWED_RESPONSE_TIME = self.maximum_allowed_response_time
+
+    def create_protocol(self, do_move):
+        protocol = ClientHandlerProtocol(ScriptedAI(do_move), cc.PORT_NUMBER, MAXIMUM_ALLOWED_RESPONSE_TIME, FRIENDLY_UUID)
+        protocol.ai_handler_thread.start()
+        protocol.tiles = self.tiles
+        protocol.world = JSON.as_initial_world(self.tiles)
+        self.protocols.append(protocol)
+        return protocol
+
+    def create_game_state(self):
+        return json.dumps(random_game_state(self.generator, self.tiles))
+
+    def timed_response(self, protocol, game_state=None, turn_start=None):
+        start_time = time.time()
+        response = protocol.get_timed_ai_response(game_state or self.create_game_state(), turn_start)
+        return response, (time.time() - start_time) * 1000
+
+    def test_response_is_returned_as_soon_as_it_is_ready(self):
+        fallback_plans = []
+        plan_fallback_moves = ClientHandlerProtocolModule.plan_fallback_moves
+        ClientHandlerProtocolModule.plan_fallback_moves = lambda *args: fallback_plans.append(args)
+        try:
+            protocol = self.create_protocol(lambda world, friendly_units, enemy_units: None)
+            for turn in range(3):
+                response, elapsed = self.timed_response(protocol)
+                self.assertIsInstance(response, PlayerTurnActionInfo)
+                self.assertLess(elapsed, MAXIMUM_ALLOWED_RESPONSE_TIME / 2)
+                self.assertTrue(protocol.ai_responded)
+        finally:
+            ClientHandlerProtocolModule.plan_fallback_moves = plan_fallback_moves
+        self.assertEqual([], fallback_plans)
+
+    def test_timeout_sends_fallback_moves(self):
+        release = threading.Event()
+        played = []
+        def do_move(world, friendly_units, enemy_units):
+            played.append((world, friendly_units))
+            world.move(friendly_units[0], world.get_neighbours(friendly_units[0].position)[Direction.EAST])
+            release.wait(5)
+
+        planned_worlds = []
+        plan_fallback_moves = ClientHandlerProtocolModule.plan_fallback_moves
+        def record_fallback_world(decoded_game_data, world=None):
+            planned_worlds.append(world)
+            return plan_fallback_moves(decoded_game_data, world)
+
+        protocol = self.create_protocol(do_move)
+        ClientHandlerProtocolModule.plan_fallback_moves = record_fallback_world
+        try:
+            response, elapsed = self.timed_response(protocol)
+        finally:
+            ClientHandlerProtocolModule.plan_fallback_moves = plan_fallback_moves
+            release.set()
+        self.assertGreaterEqual(elapsed, MAXIMUM_ALLOWED_RESPONSE_TIME * 0.9)
+        self.assertFalse(protocol.ai_responded)
+
+        # The fallback is planned on a World the AI is not using
+        world, units = played[0]
+        self.assertEqual(1, len(planned_worlds))
+        self.assertIsNotNone(planned_worlds[0])
+        self.assertIsNot(world, planned_worlds[0])
+
+        # The unit the AI had moved keeps its move, the others head for the closest capturable tile
+        protocol.ai_response.result(1)
+        world.set_turn_token(None)
+        next_points = world.get_next_points_towards_capturable_tiles([unit.position for unit in units])
+        next_points[0] = units[0].get_next_move_target()
+        self.assertEqual({unit.uuid: point for unit, point in zip(units, next_points) if point != unit.position},
+                         {uuid: unit.get_next_move_target() for uuid, unit in response.uuid_to_core_map.items()})
+
+    def test_deadline_is_measured_from_turn_start(self):
+        deadlines = []
+        release = threading.Event()
+        def do_move(world, friendly_units, enemy_units):
+            deadlines.append(world.deadline)
+            release.wait(5)
+
+        protocol = self.create_protocol(do_move)
+        turn_start = time.time() - MAXIMUM_ALLOWED_RESPONSE_TIME / 2000
+        try:
+            response, elapsed = self.timed_response(protocol, turn_start=turn_start)
+        finally:
+            release.set()
+        self.assertEqual([turn_start + cc.MAXIMUM_ALLOWED_RESPONSE_TIME / 1000], deadlines)
+        self.assertLess(elapsed, MAXIMUM_ALLOWED_RESPONSE_TIME * 0.75)
+        self.assertFalse(protocol.ai_responded)
+
+    def test_late_turn_is_cancelled_and_discarded(self):
+        turns = []
+        def do_move(world, friendly_units, enemy_units):
+            turns.append(world)
+            if len(turns) == 1:
+                try:
+                    while True:
+                        world.get_shortest_path((0, 0), (3, 3), None)
+                except TurnCancelled:
+                    turns.append("cancelled")
+                    raise
+
+        protocol = self.create_protocol(do_move)
+        self.timed_response(protocol)
+        self.assertFalse(protocol.ai_responded)
+        # The late turn stops at its next World query, and its moves are never sent
+        self.assertEqual(Signals.NO_RESPONSE.name, protocol.ai_response.result(1))
+        self.assertEqual("cancelled", turns[1])
+
+        response, elapsed = self.timed_response(protocol)
+        self.assertIsInstance(response, PlayerTurnActionInfo)
+        self.assertLess(elapsed, MAXIMUM_ALLOWED_RESPONSE_TIME / 2)
+        self.assertTrue(protocol.ai_responded)
+        self.assertEqual(3, len(turns))
+
+    def test_stalled_turn_does_not_delay_the_next_one(self):
+        turns = []
+        def do_move(world, friendly_units, enemy_units):
+            turns.append(world)
+            if len(turns) == 1:
+                # Busy without any World query, so the cancelled turn can not be stopped
+                end_time = time.time() + 2.5 * MAXIMUM_ALLOWED_RESPONSE_TIME / 1000
+                while time.time() < end_time:
+                    pass
+
+        protocol = self.create_protocol(do_move)
+        self.timed_response(protocol)
+        self.assertFalse(protocol.ai_responded)
+        stalled_response = protocol.ai_response
+
+        # While the PlayerAI is busy, it is not given the next turn, whose fallback moves are sent at once
+        response, elapsed = self.timed_response(protocol)
+        self.assertIsInstance(response, PlayerTurnActionInfo)
+        self.assertLess(elapsed, MAXIMUM_ALLOWED_RESPONSE_TIME / 2)
+        self.assertFalse(protocol.ai_responded)
+        self.assertEqual(1, len(turns))
+
+        stalled_response.result(1)
+        response, elapsed = self.timed_response(protocol)
+        self.assertIsInstance(response, PlayerTurnActionInfo)
+        self.assertLess(elapsed, MAXIMUM_ALLOWED_RESPONSE_TIME / 2)
+        self.assertTrue(protocol.ai_responded)
+        self.assertEqual(2, len(turns))
+
+    def test_exception_in_do_move(self):
+        def do_move(world, friendly_units, enemy_units):
+            raise ValueError("do_move failed")
+        protocol = self.create_protocol(do_move)
+        response, elapsed = self.timed_response(protocol)
+        self.assertEqual(Signals.NO_RESPONSE.name, response)
+        self.assertLess(elapsed, MAXIMUM_ALLOWED_RESPONSE_TIME / 2)
+
+    def create_isolated_protocol(self):
+        executor = AIProcessExecutor(StallingAI)
+        protocol = ClientHandlerProtocol(None, cc.PORT_NUMBER, MAXIMUM_ALLOWED_RESPONSE_TIME, FRIENDLY_UUID, executor)
+        self.protocols.append(protocol)
+        executor.start()
+        executor.set_initial_state(json.dumps({'tiles': [[tile.name for tile in column] for column in self.tiles],
+                                               'uuidToOrderedDirections': {FRIENDLY_UUID: ['NORTH', 'EAST', 'SOUTH', 'WEST']}}),
+                                   FRIENDLY_UUID)
+        protocol.tiles = self.tiles
+        protocol.world = JSON.as_initial_world(self.tiles)
+        return protocol, executor
+
+    def test_process_executor(self):
+        protocol, executor = self.create_isolated_protocol()
+
+        game_state = random_game_state(self.generator, self.tiles)
+        move = json.loads(protocol.get_isolated_ai_response(json.dumps(game_state)))
+        units = game_state['playerUUIDToPlayerTypeMap'][FRIENDLY_UUID]['friendlyUnits']
+        self.assertEqual({unit['uuid'] for unit in units}, set(move['uuidToCoreMap']))
+        for unit in units:
+            position = unit['position']
+            self.assertEqual({'x': (position['x'] + 1) % 7, 'y': position['y']}, move['uuidToCoreMap'][unit['uuid']]['nextMoveTarget'])
+
+        # A worker that overruns is killed and replaced once the fallback has been sent, and the next turn is
+        # played by the new one
+        stalled_process = executor._process
+        game_state['playerUUIDToPlayerTypeMap'][FRIENDLY_UUID]['friendlyUnits'] = []
+        protocol.client_channel_handler = FakeChannelHandler([json.dumps(game_state)])
+        sent = []
+        protocol.client_channel_handler.send_message = lambda message: sent.append((message, stalled_process.is_alive()))
+        start_time = time.time()
+        protocol.next_move_from_client(start_time)
+        self.assertEqual([({'uuidToCoreMap': {}}, True)], [(json.loads(message), alive) for message, alive in sent])
+        self.assertLess(time.time() - start_time, 2)
+        self.assertFalse(stalled_process.is_alive())
+        self.assertTrue(executor._process.is_alive())
+
+        game_state['playerUUIDToPlayerTypeMap'][FRIENDLY_UUID]['friendlyUnits'] = units
+        move = json.loads(protocol.get_isolated_ai_response(json.dumps(game_state)))
+        self.assertEqual({unit['uuid'] for unit in units}, set(move['uuidToCoreMap']))
+
+    def test_dead_worker_is_replaced(self):
+        protocol, executor = self.create_isolated_protocol()
+        dead_process = executor._process
+        dead_process.terminate()
+        dead_process.join()
+
+        game_state = random_game_state(self.generator, self.tiles)
+        self.assertEqual(Signals.NO_RESPONSE.name, protocol.get_isolated_ai_response(json.dumps(game_state)))
+        self.assertIsNot(dead_process, executor._process)
+        move = json.loads(protocol.get_isolated_ai_response(json.dumps(game_state)))
+        units = game_state['playerUUIDToPlayerTypeMap'][FRIENDLY_UUID]['friendlyUnits']
+        self.assertEqual({unit['uuid'] for unit in units}, set(move['uuidToCoreMap']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+from unittest import TestCase
+import unittest
+
+from PythonClientAPI.Game.Enums import TileType, Team, Direction
+from PythonClientAPI.Game.MapTopology import get_map_topology
+from PythonClientAPI.Game.World import World
+
+
+class TestMapTopology(TestCase):
+
+    def setUp(self):
+        Direction.ORDERED_DIRECTIONS = [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
+        self.width, self.height = 7, 5
+        self.tiles = [[TileType.TILE for y in range(self.height)] for x in range(self.width)]
+        self.tiles[3][2] = TileType.WALL
+
+    def test_tables(self):
+        topology = get_map_topology(self.tiles)
+        self.assertTrue(topology.is_wall((3, 2)))
+        self.assertEqual(0, topology.walkable[topology.get_cell((3, 2))])
+        self.assertEqual(-1, topology.components[topology.get_cell((3, 2))])
+        self.assertTrue(topology.are_connected((0, 0), (6, 4)))
+        self.assertTrue(topology.at_edge((6, 1)))
+        self.assertFalse(topology.at_edge((3, 3)))
+        self.assertEqual([(0, 4), (1, 0), (0, 1), (6, 0)], [topology.points[cell] for cell in topology.neighbours[0]])
+        self.assertEqual({Direction.NORTH: (0, 4), Direction.EAST: (1, 0), Direction.SOUTH: (0, 1), Direction.WEST: (6, 0)},
+                         topology.get_neighbours((0, 0)))
+        for direction, border in [(Direction.NORTH, lambda p: p[1] == 0), (Direction.SOUTH, lambda p: p[1] == self.height - 1),
+                                  (Direction.WEST, lambda p: p[0] == 0), (Direction.EAST, lambda p: p[0] == self.width - 1)]:
+            expected = sum(1 << cell for cell, point in enumerate(topology.points) if border(point))
+            self.assertEqual(expected, topology.edge_masks[direction])
+
+    def test_shared_between_worlds(self):
+        empty = {Team.FRIENDLY: [], Team.ENEMY: []}
+        first = World(self.tiles, [], [], dict(empty), dict(empty))
+        second = World(self.tiles, [], [], dict(empty), dict(empty))
+        self.assertIs(first.get_topology(), second.get_topology())
+
+        Direction.ORDERED_DIRECTIONS = [Direction.WEST, Direction.SOUTH, Direction.EAST, Direction.NORTH]
+        reordered = first.get_topology()
+        self.assertEqual([(6, 0), (0, 1), (1, 0), (0, 4)], [reordered.points[cell] for cell in reordered.neighbours[0]])
+        self.assertEqual(list(Direction.ORDERED_DIRECTIONS), list(first.get_neighbours((0, 0)).keys()))
+        Direction.ORDERED_DIRECTIONS = [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
+
+if __name__ == '__main__':
+    unittest.main()
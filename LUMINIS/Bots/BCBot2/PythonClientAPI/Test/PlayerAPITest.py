@@ -1,6 +1,8 @@
 from unittest import TestCase
+import time
 import unittest
 
+import PythonClientAPI.Communication.CommunicatorConstants as cc
 from PythonClientAPI.Game.Entities import Tile, FriendlyUnit, EnemyUnit
 from PythonClientAPI.Game.Enums import TileType, Team, Direction
 from PythonClientAPI.Game.PlayerAPI import PlayerAPI
@@ -151,6 +153,23 @@ class TestPlayerAPI(TestCase):
         world = World(self.tiles, [], [], team_tiles, {Team.FRIENDLY: [], Team.ENEMY: []})
         self.assertEqual((3,1), world.get_closest_enemy_tile_from((2,1), None).position)
         self.assertEqual((2,18), world.get_closest_capturable_tile_from((2,1), None).position)
+        self.assertIsNone(world.get_closest_capturable_tile_from((2,1), None, deadline=0))
+
+    def test_get_closest_capturable_tile_from_wall(self):
+        self.tiles[5][5] = TileType.WALL
+        world = World(self.tiles, [], [], {Team.FRIENDLY: [], Team.ENEMY: []}, {Team.FRIENDLY: [], Team.ENEMY: []})
+        tile = world.get_closest_capturable_tile_from((5,5), None)
+        self.assertEqual(1, world.get_taxicab_distance((5,5), tile.position))
+
+    def test_deadline(self):
+        world = World(self.tiles, [], [], {Team.FRIENDLY: [], Team.ENEMY: []}, {Team.FRIENDLY: [], Team.ENEMY: []})
+        maximum_response_time = cc.MAXIMUM_ALLOWED_RESPONSE_TIME / 1000
+        turn_start = time.time()
+        world.set_turn_start(turn_start)
+        self.assertEqual(turn_start + maximum_response_time, world.deadline)
+        self.assertTrue(0 < world.time_remaining() <= maximum_response_time)
+        world.set_turn_start(turn_start - 2 * maximum_response_time)
+        self.assertEqual(0, world.time_remaining())
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
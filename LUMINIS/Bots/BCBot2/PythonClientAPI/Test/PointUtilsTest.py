@@ -0,0 +1,68 @@
+from unittest import TestCase
+import unittest
+
+from PythonClientAPI.Game import PointUtils
+
+
+class TestPointUtils(TestCase):
+
+    def setUp(self):
+        PointUtils.set_map_dimensions(7, 5)
+
+    def test_mod_point_matches_modulo(self):
+        for x in range(-3, 11):
+            for y in range(-3, 9):
+                self.assertEqual((x % 7, y % 5), PointUtils.mod_point((x, y), (7, 5)))
+                self.assertEqual((x % 4, y % 6), PointUtils.mod_point((x, y), (4, 6)))
+
+    def test_wrapped_points_are_interned(self):
+        table = PointUtils.get_point_table(7, 5)
+        self.assertIs(table[6 * 5 + 4], PointUtils.mod_point((-1, -1), (7, 5)))
+        self.assertIs(table[0], PointUtils.mod_point((7, 5), (7, 5)))
+        self.assertIs(table[3 * 5 + 2], PointUtils.intern_point(3, 2))
+
+    def test_cache_stats(self):
+        PointUtils.mod_point((1, 1), (7, 5))
+        PointUtils.mod_point((1, 1), (4, 6))
+        PointUtils.mod_point((1, 1), (4, 6))
+        PointUtils.mod_point((-1, 5), (7, 5))
+        stats = PointUtils.cache_stats()
+        self.assertEqual(2, stats['mod_point_table']['hits'])
+        self.assertEqual(2, stats['mod_point_table']['misses'])
+        self.assertEqual(0.5, stats['mod_point_table']['hit_rate'])
+        self.assertEqual(len(PointUtils._wrap_table), stats['mod_point_table']['size'])
+        self.assertEqual(1, stats['_mod_point']['hits'])
+        self.assertEqual(1, stats['_mod_point']['size'])
+        self.assertEqual(0.5, stats['_mod_point']['hit_rate'])
+
+        # Reading the stats is not counted as a lookup
+        self.assertEqual(stats, PointUtils.cache_stats())
+
+        PointUtils.set_map_dimensions(7, 5)
+        self.assertEqual(0, PointUtils.cache_stats()['_mod_point']['size'])
+        self.assertEqual(0, PointUtils.cache_stats()['mod_point_table']['hits'])
+
+    def test_memoized_is_bounded(self):
+        square = PointUtils.memoized(lambda n: n * n, maxsize=8)
+        for n in range(100):
+            self.assertEqual(n * n, square(n))
+        self.assertEqual(8, square.cache_info().currsize)
+
+    def test_distance_matrix_matches_pairwise_distance(self):
+        points = [(x, y) for x in range(7) for y in range(5)]
+        sources, targets = points[::3], points[1::2]
+        matrix = PointUtils.mod_taxi_cab_distance_matrix(sources, targets, 7, 5)
+        for i, source in enumerate(sources):
+            for j, target in enumerate(targets):
+                self.assertEqual(PointUtils.mod_taxi_cab_distance(source, target, 7, 5), matrix[i][j])
+        self.assertEqual(matrix[2], PointUtils.mod_taxi_cab_distances(sources[2], targets, 7, 5))
+        self.assertEqual([], PointUtils.mod_taxi_cab_distance_matrix([], targets, 7, 5))
+
+    def test_distance_field(self):
+        field = PointUtils.mod_taxi_cab_distance_field((6, 1), 7, 5)
+        for x in range(7):
+            for y in range(5):
+                self.assertEqual(PointUtils.mod_taxi_cab_distance((x, y), (6, 1), 7, 5), field[x * 5 + y])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import json
+import multiprocessing
+import threading
+from concurrent.futures import Future
+
+import PythonClientAPI.Communication.CommunicatorConstants as cc
+import PythonClientAPI.Configurator.Constants as constants
+import PythonClientAPI.Game.JSON as JSON
+from PythonClientAPI.Communication.AIHandlerThread import play_turn
+from PythonClientAPI.Communication.Signals import Signals
+from PythonClientAPI.Navigation.NavigationCache import navigation_cache
+
+# Seconds a stopped worker gets to exit on its own before it is killed
+STOP_TIMEOUT = 1
+
+
+class AIProcessExecutor:
+    """
+    Runs the player AI in a worker process, so that do_move neither competes for the GIL with the protocol
+    thread nor keeps running after its turn is over.
+
+    Each turn, the game state JSON received from the server is passed on to the worker unchanged and the
+    worker sends back the JSON of its move, so nothing is decoded twice. The worker keeps its World and its
+    navigation cache from one turn to the next. A worker that misses the deadline is killed and replaced at
+    once, so that its successor can set up the map and load the navigation cache before the next turn.
+    """
+    def __init__(self, create_player_ai, load_navigation=None, navigation_args=()):
+        """
+        :param function create_player_ai: takes no arguments and returns the PlayerAI, called in the worker
+        :param function load_navigation: loads the navigation cache, called in the background in the worker, or None
+        :param tuple navigation_args: arguments of load_navigation
+        """
+        self._create_player_ai = create_player_ai
+        self._load_navigation = load_navigation
+        self._navigation_args = navigation_args
+        self._initial_state = None
+        self._process = None
+        self._connection = None
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts a worker, and sets up its map if the match has already started.
+        """
+        connection, worker_connection = multiprocessing.Pipe()
+        settings = (_get_settings(constants), _get_settings(cc))
+        self._process = multiprocessing.Process(target=run_worker, name="AIProcess", daemon=True,
+                                                args=(worker_connection, self._create_player_ai, settings,
+                                                      self._load_navigation, self._navigation_args))
+        self._process.start()
+        worker_connection.close()
+        self._connection = connection
+        threading.Thread(target=self._receive, args=(connection,), name="AIProcessReader", daemon=True).start()
+        if self._initial_state is not None:
+            connection.send(('ready',) + self._initial_state)
+
+    def set_initial_state(self, game_initial_state, client_uuid):
+        """
+        :param str game_initial_state: JSON sent by the server after GET_READY
+        :param str client_uuid: uuid of this player
+        """
+        self._initial_state = (game_initial_state, client_uuid)
+        self._connection.send(('ready', game_initial_state, client_uuid))
+
+    def submit(self, turn, game_state, turn_start):
+        """
+        :param int turn: number of the turn
+        :param str game_state: JSON sent by the server after MOVE
+        :param float turn_start: time.time() at which the MOVE message arrived, from which the worker's World measures its deadline
+        :return: future whose result is the JSON of the move, or Signals.NO_RESPONSE.name if do_move raised or
+            the worker had died
+        :rtype: concurrent.futures.Future
+        """
+        future = Future()
+        with self._lock:
+            self._pending = (turn, future)
+        try:
+            self._connection.send(('move', turn, game_state, turn_start))
+        except OSError:
+            # The worker died, e.g. on a game state it could not decode, so this turn is lost but the next one is not
+            self.restart()
+            future.set_result(Signals.NO_RESPONSE.name)
+        return future
+
+    def restart(self):
+        """
+        Kills the worker, abandoning the turn it is playing, and starts a new one.
+        """
+        self._kill()
+        self.start()
+
+    def stop(self):
+        if self._process is None: return
+        try:
+            self._connection.send(None)
+        except OSError:
+            pass
+        self._process.join(STOP_TIMEOUT)
+        self._kill()
+
+    def _kill(self):
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join()
+        self._process = None
+        with self._lock:
+            self._pending = None
+
+    def _receive(self, connection):
+        # Runs until the worker exits, which closes its end of the pipe
+        try:
+            while True:
+                turn, move = connection.recv()
+                with self._lock:
+                    pending = self._pending
+                    if pending is None or pending[0] != turn: continue
+                    self._pending = None
+                pending[1].set_result(move)
+        except (EOFError, OSError):
+            connection.close()
+
+
+def _get_settings(module):
+    return {name: value for name, value in vars(module).items() if name.isupper()}
+
+
+def run_worker(connection, create_player_ai, settings, load_navigation, navigation_args):
+    """
+    Main loop of the worker process of an AIProcessExecutor.
+    """
+    # The worker may be spawned from scratch rather than forked, so the configuration is carried over explicitly
+    for module, module_settings in zip((constants, cc), settings):
+        for name, value in module_settings.items():
+            setattr(module, name, value)
+    if load_navigation is not None:
+        navigation_cache.load_in_background(load_navigation, *navigation_args)
+    player_ai = create_player_ai()
+
+    tiles = world = None
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None: return
+
+        if message[0] == 'ready':
+            tiles = JSON.parse_initial_state(message[1], message[2])
+            world = JSON.as_initial_world(tiles)
+        else:
+            turn, game_state, turn_start = message[1:]
+            decoded_game_data = JSON.parse_game_state(game_state, tiles, world)
+            decoded_game_data.world.set_turn_start(turn_start)
+            move = play_turn(player_ai, decoded_game_data)
+            if not isinstance(move, str):
+                move = json.dumps(move, cls=JSON.FFEncoder)
+            connection.send((turn, move))
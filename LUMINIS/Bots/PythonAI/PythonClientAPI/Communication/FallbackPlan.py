@@ -0,0 +1,48 @@
+from PythonClientAPI.Configurator import Constants
+from PythonClientAPI.Game.Entities import FriendlyUnit
+from PythonClientAPI.Game.Enums import MoveType
+from PythonClientAPI.Game.GameState import PlayerTurnActionInfo
+
+# Fraction of the maximum response time kept at the end of a turn to plan the fallback, if the AI is not done by then
+FALLBACK_RESERVE_FRACTION = 0.2
+
+
+def plan_fallback_moves(decoded_game_data, world=None):
+    """
+    Plans the moves sent instead of the AI's when it runs out of time. Units the AI had already moved keep
+    their move, and every other unit steps towards its closest capturable tile.
+
+    The AI may still be running while this is called, so the units it handed to do_move are only read, and
+    the moves are returned on copies of them. Its World must not be searched either, since that fills the
+    World's caches from two threads at once, so a World of the same turn that the AI does not use is passed instead.
+
+    :param decoded_game_data: GameState of the turn
+    :param World world: World to plan on, defaults to the World of decoded_game_data when the AI is not using it
+    :return: moves of the turn
+    :rtype: PlayerTurnActionInfo
+    """
+    units = list(decoded_game_data.player_uuid_to_player_type_map[Constants.LOCAL_PLAYER_UUID].friendly_units)
+    targets = {}
+    waiting_units = []
+    for unit in units:
+        # World.move sets the target before the move type, so a MOVE type always comes with its target
+        target = unit.get_next_move_target()
+        if unit.get_next_move_type() == MoveType.MOVE:
+            targets[unit] = target
+        else:
+            waiting_units.append(unit)
+
+    world = world or decoded_game_data.world
+    next_points = world.get_next_points_towards_capturable_tiles([unit.position for unit in waiting_units])
+    for unit, point in zip(waiting_units, next_points):
+        if point != unit.position:
+            targets[unit] = point
+
+    return PlayerTurnActionInfo({unit.uuid: _copy_with_move(unit, target) for unit, target in targets.items()})
+
+
+def _copy_with_move(unit, target):
+    copy = FriendlyUnit(unit.team, unit.uuid, unit.health, unit.position, unit.last_move_result, [])
+    copy._next_move_target = target
+    copy._next_move_type = MoveType.MOVE
+    return copy
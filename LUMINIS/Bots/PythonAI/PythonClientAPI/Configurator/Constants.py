@@ -3,3 +3,5 @@ import sys
 PLAYER_AI_PATH = sys.path[0]
 LOCAL_PLAYER_UUID = "UNKNOWN_PLAYER"
 MAP_NAME = ""
+NAVIGATION_MODE = "eager"
+AI_EXECUTOR = "thread"
@@ -2,11 +2,14 @@ from PythonClientAPI.Game.Enums import MoveType, Team, Direction
 from PythonClientAPI.Game.PointUtils import *
 
 class Entity:
+    # Entities are created by the thousand every turn, so none of them carry a __dict__
+    __slots__ = ('position',)
+
     def __init__(self, position):
         self.position = position
 
     def __eq__(self, other):
-        return (isinstance(other, self.__class__) and self.position == other.position)
+        return self is other or (isinstance(other, self.__class__) and self.position == other.position)
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -17,6 +20,8 @@ class Tile(Entity):
 
     :ivar (int,int) position: tile's position
     """
+    __slots__ = ('_team', '_permanent')
+
     def __init__(self, position, team, permanent):
         self.position = position
 
@@ -58,6 +63,8 @@ class Tile(Entity):
         return "{} TILE: {}".format(self._team.name, self.position)
 
 class Unit(Entity):
+    __slots__ = ('uuid', 'health', 'team')
+
     def __init__(self, team, uuid, health, position):
         self.uuid = uuid
         self.health = health
@@ -80,7 +87,7 @@ class Unit(Entity):
         return self.health <= other.health
 
     def __eq__(self, other):
-        return isinstance(other, self.__class__) and self.uuid == other.uuid
+        return self is other or (isinstance(other, self.__class__) and self.uuid == other.uuid)
 
     def __ne__(self, other):
         return not (self == other)
@@ -103,6 +110,8 @@ class FriendlyUnit(Unit):
     :ivar (int,int) position: unit position
     :ivar MoveResult last_move_result: last move result
     """
+    __slots__ = ('last_move_result', '_next_move_target', '_next_move_type', '_merged_units_uuid')
+
     def __init__(self, team, uuid, health, position, last_move_result, merged_units_uuid):
         super().__init__(team, uuid, health, position)
         self.last_move_result = last_move_result
@@ -145,6 +154,8 @@ class EnemyUnit(Unit):
     :ivar int health: health point
     :ivar (int,int) position: unit position
     """
+    __slots__ = ()
+
     def __init__(self, team, uuid, health, position):
         super().__init__(team, uuid, health, position)
 
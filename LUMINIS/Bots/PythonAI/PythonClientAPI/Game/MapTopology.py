@@ -0,0 +1,112 @@
+from PythonClientAPI.Game.Enums import TileType, Direction
+from PythonClientAPI.Game.PointUtils import get_point_table
+
+
+class MapTopology:
+    """
+    Everything about a map that stays the same for a whole match, precomputed once on cell ids x * height + y.
+
+    Build it with get_map_topology, which returns the same object for as long as the map and
+    Direction.ORDERED_DIRECTIONS stay the same, so every PlayerAPI, GridEngine and OwnershipGrid of a match
+    shares one copy. Nothing in it is modified after construction.
+
+    :ivar tuple points: canonical (x,y) tuple of each cell
+    :ivar bytes walls: 1 for each wall
+    :ivar bytes walkable: 1 for each cell that is not a wall
+    :ivar bytes edges: 1 for each cell on the border of the map
+    :ivar tuple neighbours: for each cell, the ids of its four torus neighbours in ordered_directions order
+    :ivar tuple components: connected component label of each cell, or -1 for walls
+    :ivar dict edge_masks: Direction to the mask of the cells on that border, as an int with bit i set for cell i
+    """
+    def __init__(self, tiles, ordered_directions=None):
+        self.tiles = tiles
+        self.width = width = len(tiles)
+        self.height = height = len(tiles[0])
+        self.cell_count = width * height
+        self.ordered_directions = tuple(ordered_directions or Direction.ORDERED_DIRECTIONS)
+
+        self.points = tuple(get_point_table(width, height))
+        self.xs = tuple(x for x in range(width) for y in range(height))
+        self.ys = tuple(y for x in range(width) for y in range(height))
+        self.walls = bytes(tiles[x][y] == TileType.WALL for x in range(width) for y in range(height))
+        self.walkable = bytes(not wall for wall in self.walls)
+        self.edges = bytes(x == 0 or y == 0 or x == width - 1 or y == height - 1 for x in range(width) for y in range(height))
+
+        offsets = [direction.value for direction in self.ordered_directions]
+        self.neighbours = tuple(tuple(((x + dx) % width) * height + (y + dy) % height for dx, dy in offsets)
+                                for x in range(width) for y in range(height))
+        self._neighbour_items = tuple(tuple(zip(self.ordered_directions, (self.points[neighbour] for neighbour in cell_neighbours)))
+                                      for cell_neighbours in self.neighbours)
+
+        first_column = (1 << height) - 1
+        self.edge_masks = {
+            Direction.NORTH: sum(1 << (x * height) for x in range(width)),
+            Direction.SOUTH: sum(1 << (x * height + height - 1) for x in range(width)),
+            Direction.WEST: first_column,
+            Direction.EAST: first_column << ((width - 1) * height),
+        }
+        self.components = self._label_components()
+
+    def _label_components(self):
+        components = [-1] * self.cell_count
+        walls, neighbours = self.walls, self.neighbours
+        label = 0
+        for cell in range(self.cell_count):
+            if walls[cell] or components[cell] >= 0:
+                continue
+            components[cell] = label
+            frontier = [cell]
+            while frontier:
+                current = frontier.pop()
+                for neighbour in neighbours[current]:
+                    if components[neighbour] < 0 and not walls[neighbour]:
+                        components[neighbour] = label
+                        frontier.append(neighbour)
+            label += 1
+        return tuple(components)
+
+    def get_cell(self, point):
+        return point[0] * self.height + point[1]
+
+    def contains(self, point):
+        return 0 <= point[0] < self.width and 0 <= point[1] < self.height
+
+    def is_wall(self, point):
+        return self.walls[point[0] * self.height + point[1]] == 1
+
+    def at_edge(self, point):
+        return self.edges[point[0] * self.height + point[1]] == 1
+
+    def get_neighbours(self, point):
+        """
+        :return: dictionary from each of the ordered directions to the neighbouring point of point in that direction
+        :rtype: dict
+        """
+        return dict(self._neighbour_items[point[0] * self.height + point[1]])
+
+    def are_connected(self, start, end):
+        """
+        :return: True iff there is a path from start to end that only goes around walls
+        :rtype: bool
+        """
+        components = self.components
+        start_component = components[start[0] * self.height + start[1]]
+        return start_component >= 0 and start_component == components[end[0] * self.height + end[1]]
+
+
+_topology = None
+
+
+def get_map_topology(tiles, ordered_directions=None):
+    """
+    :param tiles: map as a list of columns of TileType
+    :param ordered_directions: neighbour order, defaults to Direction.ORDERED_DIRECTIONS
+    :return: the topology of tiles, built on the first call for this map and direction order and shared afterwards
+    :rtype: MapTopology
+    """
+    global _topology
+    ordered_directions = tuple(ordered_directions or Direction.ORDERED_DIRECTIONS)
+    topology = _topology
+    if topology is None or topology.tiles is not tiles or topology.ordered_directions != ordered_directions:
+        topology = _topology = MapTopology(tiles, ordered_directions)
+    return topology
@@ -0,0 +1,184 @@
+import time
+
+from PythonClientAPI.Game.Enums import Direction
+from PythonClientAPI.Navigation.GridEngine import DEADLINE_CHECK_INTERVAL
+
+class DistanceField:
+    """
+    Breadth-first search from a single source, on the cell ids of a GridEngine.
+
+    The search is expanded lazily: queries only expand as far as they need to, and later queries carry on
+    from where earlier ones stopped. Cells are visited in the same order as PlayerAPI.get_closest_point_from,
+    so closest-point queries answered from a field match that method.
+
+    :ivar (int,int) source: source point
+    :ivar list distances: distance from source to each cell id, or -1 if not reached (yet)
+    :ivar bytearray directions: Direction.DIRECTION_TO_INDEX of the step into each cell from its parent, 0 at the source
+    :ivar list parents: parent cell id of each cell on the search tree, or -1
+    """
+    def __init__(self, engine, source):
+        self.engine = engine
+        self.source = source
+        self.source_cell = engine.get_cell(source)
+
+        self.distances = [-1] * engine.cell_count
+        self.directions = bytearray(engine.cell_count)
+        self.parents = [-1] * engine.cell_count
+        self.distances[self.source_cell] = 0
+
+        self._order = [self.source_cell]
+        self._expanded = 0
+        self._direction_indices = [Direction.DIRECTION_TO_INDEX[direction] for direction in engine.ordered_directions]
+
+    def _expand(self, target_cell=None, expanded_count=None):
+        """
+        Expands cells in breadth-first order until target_cell is reached, expanded_count cells have been
+        expanded, or every reachable cell has been expanded.
+        """
+        order, distances, directions, parents = self._order, self.distances, self.directions, self.parents
+        walls, neighbours, direction_indices = self.engine.walls, self.engine.neighbours, self._direction_indices
+        expanded = self._expanded
+        while expanded < len(order):
+            if target_cell is not None and distances[target_cell] >= 0: break
+            if expanded_count is not None and expanded >= expanded_count: break
+            cell = order[expanded]
+            expanded += 1
+
+            distance = distances[cell] + 1
+            for direction_index, neighbour in zip(direction_indices, neighbours[cell]):
+                if distances[neighbour] < 0 and not walls[neighbour]:
+                    distances[neighbour] = distance
+                    directions[neighbour] = direction_index
+                    parents[neighbour] = cell
+                    order.append(neighbour)
+        self._expanded = expanded
+
+    def is_complete(self):
+        """
+        :return: True iff every reachable cell has been visited
+        :rtype: bool
+        """
+        return self._expanded == len(self._order)
+
+    def expand_all(self):
+        """
+        Expands the search over every reachable cell, so that distances, directions and parents are complete.
+
+        :return: this field
+        :rtype: DistanceField
+        """
+        self._expand()
+        return self
+
+    def iter_cells(self):
+        """
+        :return: iterator over reachable cell ids in breadth-first order, starting with the source
+        """
+        index = 0
+        while True:
+            if index >= self._expanded:
+                self._expand(expanded_count=index + 1)
+            if index >= len(self._order):
+                return
+            yield self._order[index]
+            index += 1
+
+    def _reach(self, cell):
+        if self.distances[cell] < 0:
+            self._expand(target_cell=cell)
+        return self.distances[cell] >= 0
+
+    def get_distance(self, point):
+        """
+        :param (int,int) point: target
+        :return: length of the shortest path from source to point, or None if there is no path
+        :rtype: int
+        """
+        cell = self.engine.get_cell(point)
+        if not self._reach(cell): return None
+        return self.distances[cell]
+
+    def get_path(self, point):
+        """
+        :param (int,int) point: target
+        :return: list of points from the step after source up to point, [point] if point is the source, or None
+        :rtype: list of (int,int)
+        """
+        if point == self.source: return [point]
+        cell = self.engine.get_cell(point)
+        if not self._reach(cell): return None
+        return self.engine.get_path(self.parents, self.source_cell, cell)
+
+    def get_next_point(self, point):
+        """
+        :param (int,int) point: target
+        :return: next point on the shortest path from source to point, or source if there is no path
+        :rtype: (int,int)
+        """
+        path = self.get_path(point)
+        if path: return path[0]
+        return self.source
+
+    def get_closest_point(self, condition, max_expansions=None, deadline=None):
+        """
+        :param function condition: a function that takes a single point and evaluates to True if it matches
+        :param int max_expansions: maximum number of points to test before giving up
+        :param float deadline: time.time() at which to give up
+        :return: the closest point from source for which condition evaluates to True, or None
+        :rtype: (int,int)
+        :raises TurnCancelled: if the turn token of the engine is cancelled during the search
+        """
+        points = self.engine.points
+        token = self.engine.turn_token
+        expansions = 0
+        for cell in self.iter_cells():
+            if max_expansions is not None and expansions >= max_expansions: return None
+            if expansions % DEADLINE_CHECK_INTERVAL == 0:
+                if token is not None: token.check()
+                if deadline is not None and time.time() > deadline: return None
+            expansions += 1
+            if condition(points[cell]): return points[cell]
+        return None
+
+    def get_closest_points(self, condition, count):
+        """
+        :param function condition: a function that takes a single point and evaluates to True if it matches
+        :param int count: maximum number of points to return
+        :return: up to count closest points from source for which condition evaluates to True, closest first
+        :rtype: list of (int,int)
+        """
+        points = self.engine.points
+        matches = []
+        if count <= 0: return matches
+        for cell in self.iter_cells():
+            if condition(points[cell]):
+                matches.append(points[cell])
+                if len(matches) >= count: break
+        return matches
+
+
+def get_distances_from_any(engine, source_cells):
+    """
+    Breadth-first search from several sources at once.
+
+    :param GridEngine engine: grid to search on
+    :param list source_cells: ids of the source cells
+    :return: distance from each cell id to its closest source, or -1 if no source can be reached
+    :rtype: list of int
+    """
+    walls, neighbours = engine.walls, engine.neighbours
+    distances = [-1] * engine.cell_count
+    frontier = [cell for cell in source_cells if not walls[cell]]
+    for cell in frontier:
+        distances[cell] = 0
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for cell in frontier:
+            for neighbour in neighbours[cell]:
+                if distances[neighbour] < 0 and not walls[neighbour]:
+                    distances[neighbour] = distance
+                    next_frontier.append(neighbour)
+        frontier = next_frontier
+    return distances
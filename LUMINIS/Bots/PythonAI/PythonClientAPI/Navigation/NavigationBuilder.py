@@ -0,0 +1,138 @@
+"""
+Builds navigation tables for maps that ship without a .nac file.
+
+The input is a JSON document with a "tiles" grid, in the same shape the server sends at GET_READY
+(a list of columns of "WALL"/"TILE" names). Run from the bot folder:
+
+    python -m PythonClientAPI.Navigation.NavigationBuilder Maps/<map>.json [Maps/<map>.nac2]
+"""
+import json
+import multiprocessing
+import os
+import sys
+
+from PythonClientAPI.Game.Enums import Direction, TileType
+from PythonClientAPI.Navigation import NavigationFormat
+
+MAX_DISTANCE = 255
+_DIRECTIONS = [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
+_DIRECTION_INDICES = [Direction.DIRECTION_TO_INDEX[direction] for direction in _DIRECTIONS]
+
+_walls = None
+_neighbours = None
+
+
+def _init_worker(walls, neighbours):
+    global _walls, _neighbours
+    _walls = walls
+    _neighbours = neighbours
+
+
+def _build_row(source):
+    """
+    Breadth-first search from one source over the whole torus, one frontier at a time.
+
+    :param int source: cell index x * height + y
+    :return: (direction row, distance row) for every target cell
+    :rtype: (bytes, bytes)
+    """
+    cell_count = len(_walls)
+    directions = bytearray(cell_count)
+    distances = bytearray(cell_count)
+    if _walls[source]:
+        return bytes(directions), bytes(distances)
+
+    visited = bytearray(_walls)
+    visited[source] = 1
+
+    frontier = []
+    for direction_index, neighbour in zip(_DIRECTION_INDICES, _neighbours[source]):
+        if not visited[neighbour]:
+            visited[neighbour] = 1
+            directions[neighbour] = direction_index
+            distances[neighbour] = 1
+            frontier.append(neighbour)
+
+    depth = 1
+    while frontier:
+        depth += 1
+        distance = min(depth, MAX_DISTANCE)
+        next_frontier = []
+        for cell in frontier:
+            first_direction = directions[cell]
+            for neighbour in _neighbours[cell]:
+                if not visited[neighbour]:
+                    visited[neighbour] = 1
+                    directions[neighbour] = first_direction
+                    distances[neighbour] = distance
+                    next_frontier.append(neighbour)
+        frontier = next_frontier
+
+    return bytes(directions), bytes(distances)
+
+
+def build_navigation_data(tiles, processes=None):
+    """
+    Computes all-pairs next-direction and distance tables for a map.
+    Unreachable targets and walls get direction NOWHERE and distance 0, distances are capped at 255.
+
+    :param tiles: list of columns of TileType
+    :param int processes: number of worker processes, defaults to the number of CPUs
+    :return: (width, height, directions, distances) in the v2 plane layout
+    """
+    width = len(tiles)
+    height = len(tiles[0])
+    walls = bytearray(width * height)
+    neighbours = []
+    for x in range(width):
+        for y in range(height):
+            walls[x * height + y] = tiles[x][y] == TileType.WALL
+            neighbours.append(tuple(((x + direction.value[0]) % width) * height + (y + direction.value[1]) % height
+                                    for direction in _DIRECTIONS))
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    sources = range(width * height)
+    if processes <= 1:
+        _init_worker(walls, neighbours)
+        rows = [_build_row(source) for source in sources]
+    else:
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(walls, neighbours)) as pool:
+            rows = pool.map(_build_row, sources, chunksize=max(1, len(sources) // (processes * 4)))
+
+    directions = b''.join(row[0] for row in rows)
+    distances = b''.join(row[1] for row in rows)
+    return width, height, directions, distances
+
+
+def build_navigation_file(tiles, file, processes=None):
+    """
+    Builds the navigation tables for a map and writes them as a v2 file that NavigationCache can load.
+
+    :return: the map hash stored in the header
+    :rtype: bytes
+    """
+    width, height, directions, distances = build_navigation_data(tiles, processes)
+    return NavigationFormat.write_navigation_data(file, width, height, directions, distances)
+
+
+def read_tiles(file):
+    with open(file, 'r') as f:
+        dct = json.load(f)
+    return [[TileType[tile] for tile in column] for column in dct["tiles"]]
+
+
+def main(args):
+    if not args or len(args) > 2:
+        print("Usage: python -m PythonClientAPI.Navigation.NavigationBuilder Maps/<map>.json [output.nac2]", file=sys.stderr)
+        return 1
+
+    destination = args[1] if len(args) == 2 else os.path.splitext(args[0])[0] + NavigationFormat.EXTENSION
+    build_navigation_file(read_tiles(args[0]), destination)
+    print("Built " + destination)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,48 +1,347 @@
+import atexit
+import mmap
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from operator import itemgetter
 from zipfile import ZipFile
 
 from PythonClientAPI.Game.Enums import Direction
+from PythonClientAPI.Navigation import NavigationFormat
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+DEFAULT_MAX_ROWS = 1024
+SHARED_MEMORY_PREFIX = "luminis_nav_"
+# Seconds to wait for another bot that is still publishing the table before decoding it ourselves
+SHARED_MEMORY_TIMEOUT = 10
+
+
+_published_segment_names = set()
+
+
+def _untrack_shared_segment(segment):
+    # Attaching registers the segment with this process' resource tracker, which would unlink it on exit
+    # while other bots are still using it. Only the bot that published the segment owns its lifetime.
+    if os.name != 'posix' or segment.name in _published_segment_names:
+        return
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except (ImportError, AttributeError):
+        pass
+
 
 class NavigationCache:
     def __init__(self):
-        self.navigation_data = []
+        self.directions = b''
+        self.distances = b''
+        self.width = 0
+        self.height = 0
+        self.map_hash = None
         self.loaded = False
+        self._mapped_file = None
+        self._shared_segment = None
+        self._owns_shared_segment = False
+
+        self._row_file = None
+        self._row_cache = None
+        self._row_lock = threading.Lock()
+        self.max_rows = DEFAULT_MAX_ROWS
+
+        self.loading = False
+        self._loaded_event = threading.Event()
+        self._loaded_event.set()
+
+    def load_in_background(self, load, *args, **kwargs):
+        """
+        Runs a load function on a daemon thread so that it overlaps with the server handshake.
+        Use wait_until_loaded to block on it.
+
+        :param function load: function loading this cache, e.g. self.load_navigation_data
+        """
+        self.loading = True
+        self._loaded_event.clear()
+        thread = threading.Thread(target=self._run_load, args=(load, args, kwargs), name="NavigationCacheLoader", daemon=True)
+        thread.start()
+        return thread
+
+    def _run_load(self, load, args, kwargs):
+        try:
+            load(*args, **kwargs)
+        except:
+            print("Could not load map navigation data: \n", file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+        finally:
+            self.loading = False
+            self._loaded_event.set()
+
+    def wait_until_loaded(self, timeout=None):
+        """
+        Blocks until a background load finishes, or until timeout seconds have passed.
+
+        :param float timeout: maximum time to wait in seconds, or None to wait indefinitely
+        :return: True iff the cache is loaded
+        :rtype: bool
+        """
+        if timeout is not None and timeout <= 0:
+            return self.loaded
+        self._loaded_event.wait(timeout)
+        return self.loaded
 
     def deserialize_nav_data(self, array):
-        d1 = array[0]
-        d2 = array[1]
-        d3 = array[2]
-        d4 = array[3]
-        d5 = array[4]
-
-        data = [[[[[[] for i5 in range(d5)] for i4 in range(d4)] for i3 in range(d3)] for i2 in range(d2)] for i1 in range(d1)]
-        for i1 in range(d1):
-            for i2 in range(d2):
-                for i3 in range(d3):
-                    for i4 in range(d4):
-                        for i5 in range(d5):
-                            index = 5 + i1 * d2 * d3 * d4 * d5 + i2 * d3 * d4 * d5 + i3 * d4 * d5 + i4 * d5 + i5
-                            data[i1][i2][i3][i4][i5] = [array[index]]
-
-        return data
-
-    def load_compiled_data(self, file):
+        """
+        Splits a decompressed .nac payload into flat direction and distance planes.
+
+        :param bytes array: decompressed navigation data
+        """
+        self.width, self.height, self.directions, self.distances = NavigationFormat.split_compiled_data(array)
+
+    def load_compiled_data(self, file, shared=False):
+        """
+        Loads a zipped .nac file. A v2 copy is written next to it so that later runs can use load_navigation_data.
+
+        If shared is True, the decoded table is published in a named shared memory segment keyed by the
+        CRC and size of the zipped table, and bots on the same map attach to it instead of decoding it again.
+        v2 files do not need this: load_navigation_data maps them, so the OS already shares their pages.
+
+        :param str file: path to the .nac file
+        :param bool shared: publish or attach to a shared memory copy of the table
+        """
+        self.close()
+
+        segment_name = None
+        if shared and shared_memory is not None:
+            segment_name = self._get_shared_segment_name(file)
+            if self._attach_shared_segment(segment_name):
+                return
+
+        width, height, directions, distances = NavigationFormat.read_compiled_data(file)
+        try:
+            self.map_hash = NavigationFormat.write_navigation_data(NavigationFormat.converted_path(file),
+                                                                   width, height, directions, distances)
+        except OSError:
+            # The v2 copy is only an optimization for later runs, so a read-only Maps folder is not an error
+            self.map_hash = NavigationFormat.compute_map_hash(directions, distances)
+
+        if segment_name is not None and self._publish_shared_segment(segment_name, width, height, directions, distances):
+            return
+
+        self.width, self.height, self.directions, self.distances = width, height, directions, distances
+        self.loaded = True
+
+    def _get_shared_segment_name(self, file):
         with ZipFile(file) as zip_file:
             info = zip_file.getinfo("data")
+        return SHARED_MEMORY_PREFIX + "{:08x}{:x}".format(info.CRC, info.file_size)
+
+    def _attach_shared_segment(self, name):
+        try:
+            segment = shared_memory.SharedMemory(name)
+        except (FileNotFoundError, OSError, ValueError):
+            return False
+        _untrack_shared_segment(segment)
 
-            expected_size = info.file_size
+        # The publisher writes the header last, so a valid magic number means the planes are complete
+        deadline = time.time() + SHARED_MEMORY_TIMEOUT
+        while bytes(segment.buf[:len(NavigationFormat.MAGIC)]) != NavigationFormat.MAGIC:
+            if time.time() > deadline:
+                segment.close()
+                return False
+            time.sleep(0.005)
 
-            data = zip_file.read('data')
+        self._use_shared_segment(segment)
+        return True
 
-            if len(data) != expected_size:
-                raise EOFError("Expected " + str(expected_size) + " bytes, got " + str(len(data)))
+    def _publish_shared_segment(self, name, width, height, directions, distances):
+        plane_size = len(directions)
+        try:
+            segment = shared_memory.SharedMemory(name, create=True, size=NavigationFormat.HEADER_SIZE + 2 * plane_size)
+        except FileExistsError:
+            # Another bot published the same table while we were decoding it, so our own copy is just as good
+            return False
+        except OSError:
+            return False
 
-            self.navigation_data = self.deserialize_nav_data(data)
-            self.loaded = True
+        planes_start = NavigationFormat.HEADER_SIZE
+        segment.buf[planes_start:planes_start + plane_size] = directions
+        segment.buf[planes_start + plane_size:planes_start + 2 * plane_size] = distances
+        segment.buf[:NavigationFormat.HEADER_SIZE] = NavigationFormat.pack_header(width, height, self.map_hash)
+
+        self._owns_shared_segment = True
+        _published_segment_names.add(segment.name)
+        atexit.register(self.close)
+        self._use_shared_segment(segment)
+        return True
+
+    def _use_shared_segment(self, segment):
+        self._shared_segment = segment
+        try:
+            self.width, self.height, self.map_hash = NavigationFormat.read_header(segment.buf)
+        except (EOFError, ValueError):
+            self.close()
+            raise
+
+        plane_size = (self.width * self.height) ** 2
+        planes_start = NavigationFormat.HEADER_SIZE
+        self.directions = segment.buf[planes_start:planes_start + plane_size]
+        self.distances = segment.buf[planes_start + plane_size:planes_start + 2 * plane_size]
+        self.loaded = True
+
+    def is_shared(self):
+        """
+        :return: True iff the table lives in a shared memory segment
+        :rtype: bool
+        """
+        return self._shared_segment is not None
+
+    def load_navigation_data(self, file, lazy=False, max_rows=DEFAULT_MAX_ROWS):
+        """
+        Memory-maps a v2 navigation file. Nothing is decompressed or copied.
+
+        In lazy mode only the header is read up front. The direction and distance rows of a source cell are
+        read the first time that cell is queried and kept in a cache of at most max_rows rows, least recently
+        used rows being evicted first.
+
+        :param str file: path to the .nac2 file
+        :param bool lazy: read source rows on demand instead of mapping the whole file
+        :param int max_rows: maximum number of source rows kept in lazy mode
+        """
+        self.close()
+
+        if lazy:
+            self._load_rows_lazily(file, max_rows)
+            return
+
+        with open(file, 'rb') as f:
+            self._mapped_file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self.width, self.height, self.map_hash = NavigationFormat.read_header(self._mapped_file)
+        except (EOFError, ValueError):
+            self.close()
+            raise
+
+        plane_size = (self.width * self.height) ** 2
+        view = memoryview(self._mapped_file)
+        self.directions = view[NavigationFormat.HEADER_SIZE:NavigationFormat.HEADER_SIZE + plane_size]
+        self.distances = view[NavigationFormat.HEADER_SIZE + plane_size:]
+        view.release()
+        self.loaded = True
+
+    def _load_rows_lazily(self, file, max_rows):
+        self._row_file = open(file, 'rb')
+        try:
+            header = self._row_file.read(NavigationFormat.HEADER_SIZE)
+            self.width, self.height, self.map_hash = NavigationFormat.read_header(header, os.fstat(self._row_file.fileno()).st_size)
+        except (EOFError, ValueError):
+            self.close()
+            raise
+
+        self.max_rows = max_rows
+        self._row_cache = OrderedDict()
+        self.loaded = True
+
+    def close(self):
+        for plane in (self.directions, self.distances):
+            if isinstance(plane, memoryview):
+                plane.release()
+        self.directions = b''
+        self.distances = b''
+        self.width = 0
+        self.height = 0
+        self.map_hash = None
+        self.loaded = False
+        if self._mapped_file is not None:
+            self._mapped_file.close()
+            self._mapped_file = None
+        if self._row_file is not None:
+            self._row_file.close()
+            self._row_file = None
+        self._row_cache = None
+        if self._shared_segment is not None:
+            self._shared_segment.close()
+            if self._owns_shared_segment:
+                _published_segment_names.discard(self._shared_segment.name)
+                self._shared_segment.unlink()
+                atexit.unregister(self.close)
+            self._shared_segment = None
+            self._owns_shared_segment = False
+
+    def get_cached_row_count(self):
+        """
+        :return: number of source rows currently held in lazy mode
+        :rtype: int
+        """
+        return len(self._row_cache) if self._row_cache is not None else 0
+
+    def _get_row(self, position):
+        source = position[0] * self.height + position[1]
+        with self._row_lock:
+            row = self._row_cache.get(source)
+            if row is not None:
+                self._row_cache.move_to_end(source)
+                return row
+
+            cell_count = self.width * self.height
+            offset = NavigationFormat.HEADER_SIZE + source * cell_count
+            self._row_file.seek(offset)
+            directions = self._row_file.read(cell_count)
+            self._row_file.seek(offset + cell_count * cell_count)
+            distances = self._row_file.read(cell_count)
+
+            row = (directions, distances)
+            self._row_cache[source] = row
+            if len(self._row_cache) > self.max_rows:
+                self._row_cache.popitem(last=False)
+            return row
+
+    def _index(self, position, target):
+        height = self.height
+        return ((position[0] * height + position[1]) * self.width + target[0]) * height + target[1]
 
     def get_next_direction_in_path(self, position, target):
-        return Direction.INDEX_TO_DIRECTION[self.navigation_data[position[0]][position[1]][target[0]][target[1]][0][0]]
+        if self._row_cache is not None:
+            return Direction.INDEX_TO_DIRECTION[self._get_row(position)[0][target[0] * self.height + target[1]]]
+        return Direction.INDEX_TO_DIRECTION[self.directions[self._index(position, target)]]
 
     def get_distance(self, position, target):
-        return self.navigation_data[position[0]][position[1]][target[0]][target[1]][1][0]
+        if self._row_cache is not None:
+            return self._get_row(position)[1][target[0] * self.height + target[1]]
+        return self.distances[self._index(position, target)]
+
+    def get_distance_matrix(self, positions, targets):
+        """
+        Looks up the distance from every position to every target, gathering each row of the matrix from
+        the distance table in a single indexed read.
+
+        :param list positions: (x,y) source points
+        :param list targets: (x,y) target points
+        :return: rows of distances, one row per position with one distance per target, 0 where there is no path
+        :rtype: list of list of int
+        """
+        height = self.height
+        target_cells = [target[0] * height + target[1] for target in targets]
+        if not target_cells: return [[] for _ in positions]
+        single = len(target_cells) == 1
+
+        if self._row_cache is not None:
+            gather = itemgetter(*target_cells)
+            rows = [gather(self._get_row(position)[1]) for position in positions]
+        else:
+            # The rows of a source are contiguous, so each row of the matrix is one gather at an offset
+            distances, cell_count = self.distances, self.width * height
+            rows = []
+            for position in positions:
+                offset = (position[0] * height + position[1]) * cell_count
+                rows.append(itemgetter(*map(offset.__add__, target_cells))(distances))
+        if single: return [[row] for row in rows]
+        return [list(row) for row in rows]
 
 navigation_cache = NavigationCache()
\ No newline at end of file
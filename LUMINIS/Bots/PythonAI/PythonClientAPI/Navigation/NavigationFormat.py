@@ -0,0 +1,166 @@
+"""
+Version 2 of the on-disk navigation format.
+
+A v2 file is a small header followed by two uncompressed planes of width * height * width * height bytes each:
+the direction plane (Direction.INDEX_TO_DIRECTION indices) and the distance plane.
+The entry for (x1, y1) -> (x2, y2) lives at ((x1 * height + y1) * width + x2) * height + y2 in both planes,
+so the file can be memory-mapped and read without any decompression.
+
+To convert the zipped .nac files shipped with the game, run from the bot folder:
+
+    python -m PythonClientAPI.Navigation.NavigationFormat Maps/*.nac
+"""
+import hashlib
+import os
+import struct
+import sys
+from zipfile import ZipFile
+
+MAGIC = b'NAC2'
+VERSION = 2
+EXTENSION = ".nac2"
+HEADER = struct.Struct('<4sHHH8s')
+HEADER_SIZE = 32
+
+
+def compute_map_hash(directions, distances):
+    """
+    :return: 8-byte digest identifying the navigation table of a map
+    :rtype: bytes
+    """
+    digest = hashlib.sha1()
+    digest.update(directions)
+    digest.update(distances)
+    return digest.digest()[:8]
+
+
+def converted_path(file):
+    """
+    :param str file: path to a zipped .nac file
+    :return: path of the v2 file stored next to it
+    :rtype: str
+    """
+    return os.path.splitext(file)[0] + EXTENSION
+
+
+def read_header(buffer, file_size=None):
+    """
+    :param buffer: bytes-like object starting with a v2 header
+    :param int file_size: size of the whole file, if buffer only holds the header.
+        Trailing bytes are allowed, since shared memory segments may be rounded up to a page.
+    :return: (width, height, map_hash)
+    :rtype: (int, int, bytes)
+    """
+    if file_size is None:
+        file_size = len(buffer)
+    if len(buffer) < HEADER_SIZE:
+        raise EOFError("Expected a header of " + str(HEADER_SIZE) + " bytes, got " + str(len(buffer)))
+
+    magic, version, width, height, map_hash = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a navigation file: bad magic number " + repr(magic))
+    if version != VERSION:
+        raise ValueError("Unsupported navigation file version " + str(version))
+
+    expected_size = HEADER_SIZE + 2 * (width * height) ** 2
+    if file_size < expected_size:
+        raise EOFError("Expected " + str(expected_size) + " bytes, got " + str(file_size))
+
+    return width, height, map_hash
+
+
+def pack_header(width, height, map_hash):
+    return HEADER.pack(MAGIC, VERSION, width, height, map_hash).ljust(HEADER_SIZE, b'\0')
+
+
+def write_navigation_data(file, width, height, directions, distances):
+    """
+    Writes a v2 navigation file. The file is written to a temporary name first and then moved into place,
+    so bots reading the same map never see a partially written file.
+
+    :return: the map hash stored in the header
+    :rtype: bytes
+    """
+    plane_size = (width * height) ** 2
+    if len(directions) != plane_size or len(distances) != plane_size:
+        raise ValueError("Expected planes of " + str(plane_size) + " bytes")
+
+    map_hash = compute_map_hash(directions, distances)
+    header = pack_header(width, height, map_hash)
+
+    temp_file = file + "." + str(os.getpid())
+    try:
+        with open(temp_file, 'wb') as f:
+            f.write(header)
+            f.write(directions)
+            f.write(distances)
+        os.replace(temp_file, file)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+    return map_hash
+
+
+def read_compiled_data(file):
+    """
+    Inflates a zipped .nac file and splits it into direction and distance planes.
+
+    :return: (width, height, directions, distances)
+    """
+    with ZipFile(file) as zip_file:
+        info = zip_file.getinfo("data")
+
+        expected_size = info.file_size
+
+        data = zip_file.read('data')
+
+        if len(data) != expected_size:
+            raise EOFError("Expected " + str(expected_size) + " bytes, got " + str(len(data)))
+
+    return split_compiled_data(data)
+
+
+def split_compiled_data(data):
+    """
+    :param bytes data: decompressed .nac payload: 5 dimension bytes, then interleaved (direction, distance) entries
+    :return: (width, height, directions, distances)
+    """
+    width, height, width2, height2, entry_size = data[0], data[1], data[2], data[3], data[4]
+    if (width, height) != (width2, height2) or entry_size != 2:
+        raise ValueError("Unexpected navigation data dimensions " + str(tuple(data[:5])))
+
+    return width, height, data[5::2], data[6::2]
+
+
+def convert_compiled_data(file, destination=None):
+    """
+    Converts a zipped .nac file into a v2 navigation file.
+
+    :param str file: path to the .nac file
+    :param str destination: output path, defaults to the .nac path with a .nac2 extension
+    :return: path of the written file
+    :rtype: str
+    """
+    if destination is None:
+        destination = converted_path(file)
+
+    width, height, directions, distances = read_compiled_data(file)
+    write_navigation_data(destination, width, height, directions, distances)
+    return destination
+
+
+def main(args):
+    if not args:
+        print("Usage: python -m PythonClientAPI.Navigation.NavigationFormat Maps/<map>.nac [...]", file=sys.stderr)
+        return 1
+
+    for file in args:
+        destination = convert_compiled_data(file)
+        print("Converted " + file + " -> " + destination)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
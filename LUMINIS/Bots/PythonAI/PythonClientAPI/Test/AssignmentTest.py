@@ -0,0 +1,84 @@
+from unittest import TestCase
+import itertools
+import random
+import unittest
+
+from PythonClientAPI.Game.Entities import FriendlyUnit, Tile
+from PythonClientAPI.Game.Enums import TileType, Team
+from PythonClientAPI.Game.World import World
+from PythonClientAPI.Navigation import Assignment
+
+
+def brute_force_cost(costs):
+    if len(costs) > len(costs[0]):
+        costs = [list(column) for column in zip(*costs)]
+    return min(sum(row[column] for row, column in zip(costs, columns))
+               for columns in itertools.permutations(range(len(costs[0])), len(costs)))
+
+
+class TestAssignment(TestCase):
+
+    def setUp(self):
+        self.generator = random.Random(2017)
+
+    def random_costs(self, row_count, column_count):
+        return [[self.generator.randint(0, 9) for column in range(column_count)] for row in range(row_count)]
+
+    def assert_valid(self, costs, assignment):
+        columns = [column for column in assignment if column >= 0]
+        self.assertEqual(len(costs), len(assignment))
+        self.assertEqual(len(columns), len(set(columns)))
+        self.assertEqual(min(len(costs), len(costs[0])), len(columns))
+        return sum(costs[row][column] for row, column in enumerate(assignment) if column >= 0)
+
+    def test_solvers_are_optimal(self):
+        for _ in range(200):
+            row_count = self.generator.randint(1, 5)
+            costs = self.random_costs(row_count, self.generator.randint(row_count, 6))
+            optimum = brute_force_cost(costs)
+            self.assertEqual(optimum, self.assert_valid(costs, Assignment.hungarian(costs)))
+            self.assertEqual(optimum, self.assert_valid(costs, Assignment.auction(costs)))
+            self.assertEqual(optimum, self.assert_valid(costs, Assignment.assign(costs)))
+
+    def test_more_rows_than_columns(self):
+        for _ in range(50):
+            costs = self.random_costs(self.generator.randint(2, 6), self.generator.randint(1, 2))
+            self.assertEqual(brute_force_cost(costs), self.assert_valid(costs, Assignment.assign(costs)))
+
+    def test_expired_deadline_is_greedy(self):
+        costs = [[1, 2], [1, 9]]
+        self.assertEqual([1, 0], Assignment.assign(costs))
+        self.assertEqual([0, 1], Assignment.assign(costs, deadline=0))
+        self.assertIsNone(Assignment.hungarian(costs, deadline=0))
+        self.assertIsNone(Assignment.auction(costs, deadline=0))
+
+
+class TestAssignUnitsToTargets(TestCase):
+
+    def setUp(self):
+        self.width, self.height = 9, 9
+        self.tiles = [[TileType.TILE for y in range(self.height)] for x in range(self.width)]
+
+    def create_world(self, units):
+        return World(self.tiles, units, [], {Team.FRIENDLY: [], Team.ENEMY: []}, {Team.FRIENDLY: [], Team.ENEMY: []})
+
+    def test_units_get_distinct_targets(self):
+        units = [FriendlyUnit("friendly", "a", 1, (2, 2), None, []), FriendlyUnit("friendly", "b", 1, (2, 4), None, [])]
+        world = self.create_world(units)
+        # Both units are closest to (2, 3), but sending a there leaves b a long way from (2, 6)
+        assignment = world.assign_units_to_targets(units, [(2, 3), (2, 6)])
+        self.assertEqual({units[0]: (2, 3), units[1]: (2, 6)}, assignment)
+        self.assertEqual(assignment, world.assign_units_to_targets(units, [(2, 3), (2, 6)], cost="taxicab"))
+        self.assertEqual({units[0]: (2, 3)}, world.assign_units_to_targets(units[:1], [(2, 6), (2, 3)]))
+        self.assertRaises(ValueError, world.assign_units_to_targets, units, [(2, 3)], "euclidean")
+
+    def test_unreachable_targets_are_not_assigned(self):
+        for y in range(self.height):
+            self.tiles[4][y] = self.tiles[8][y] = TileType.WALL
+        units = [FriendlyUnit("friendly", "a", 1, (2, 2), None, []), FriendlyUnit("friendly", "b", 1, (6, 2), None, [])]
+        world = self.create_world(units)
+        targets = [Tile((2, 5), Team.NEUTRAL, False), Tile((1, 1), Team.NEUTRAL, False)]
+        self.assertEqual({units[0]: targets[1]}, world.assign_units_to_targets(units, targets))
+
+if __name__ == '__main__':
+    unittest.main()
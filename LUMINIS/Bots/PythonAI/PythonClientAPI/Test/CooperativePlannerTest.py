@@ -0,0 +1,79 @@
+from unittest import TestCase
+import random
+import unittest
+
+from PythonClientAPI.Game.Entities import FriendlyUnit
+from PythonClientAPI.Game.Enums import TileType, Team, MoveType
+from PythonClientAPI.Game.World import World
+
+
+class TestCooperativePlanner(TestCase):
+
+    def setUp(self):
+        self.width, self.height = 15, 15
+        self.tiles = [[TileType.TILE for y in range(self.height)] for x in range(self.width)]
+
+    def create_world(self, units):
+        return World(self.tiles, units, [], {Team.FRIENDLY: [], Team.ENEMY: []}, {Team.FRIENDLY: [], Team.ENEMY: []})
+
+    def assert_no_collisions(self, units):
+        targets = [unit.get_next_move_target() for unit in units]
+        self.assertEqual(len(targets), len(set(targets)))
+        moves = {(unit.position, unit.get_next_move_target()) for unit in units if unit.get_next_move_type() == MoveType.MOVE}
+        for start, end in moves:
+            self.assertNotIn((end, start), moves)
+
+    def test_units_do_not_collide(self):
+        generator = random.Random(2017)
+        points = generator.sample([(x, y) for x in range(self.width) for y in range(self.height)], 60)
+        units = [FriendlyUnit("friendly", str(i), 1, point, None, []) for i, point in enumerate(points[:30])]
+        world = self.create_world(units)
+        move_types = world.plan_moves({unit: target for unit, target in zip(units, points[30:])})
+        self.assertEqual({unit.uuid for unit in units}, set(move_types.keys()))
+        self.assert_no_collisions(units)
+        for unit in units:
+            self.assertTrue(unit.get_next_move_type() == MoveType.REST or world.get_taxicab_distance(unit.position, unit.get_next_move_target()) == 1)
+
+    def test_units_in_a_corridor_do_not_swap(self):
+        for x in range(self.width):
+            for y in range(self.height):
+                if y != 7:
+                    self.tiles[x][y] = TileType.WALL
+        units = [FriendlyUnit("friendly", "left", 1, (5, 7), None, []), FriendlyUnit("friendly", "right", 1, (6, 7), None, [])]
+        world = self.create_world(units)
+        world.plan_moves([(units[0], (9, 7)), (units[1], (2, 7))])
+        self.assert_no_collisions(units)
+        # left may not follow right into its cell, since right is only planned afterwards
+        self.assertEqual(MoveType.REST, units[0].get_next_move_type())
+
+    def test_unit_is_not_moved_onto_a_unit_that_can_not_move(self):
+        for x in range(self.width):
+            for y in range(self.height):
+                if y != 7 or x < 2 or x > 9:
+                    self.tiles[x][y] = TileType.WALL
+        # The second unit is stuck at the dead end, so the first one must not take its cell, although it is planned first
+        units = [FriendlyUnit("friendly", "first", 1, (8, 7), None, []), FriendlyUnit("friendly", "second", 1, (9, 7), None, [])]
+        world = self.create_world(units)
+        world.plan_moves([(units[0], (9, 7)), (units[1], (2, 7))])
+        self.assert_no_collisions(units)
+        self.assertEqual([MoveType.REST, MoveType.REST], [unit.get_next_move_type() for unit in units])
+
+    def test_units_do_not_collide_on_walled_maps(self):
+        generator = random.Random(13)
+        for _ in range(50):
+            self.tiles = [[TileType.WALL if generator.random() < 0.25 else TileType.TILE for y in range(self.height)]
+                          for x in range(self.width)]
+            points = generator.sample([(x, y) for x in range(self.width) for y in range(self.height)
+                                       if self.tiles[x][y] == TileType.TILE], 60)
+            units = [FriendlyUnit("friendly", str(i), 1, point, None, []) for i, point in enumerate(points[:30])]
+            self.create_world(units).plan_moves({unit: target for unit, target in zip(units, points[30:])})
+            self.assert_no_collisions(units)
+
+    def test_expired_deadline_stops_planning(self):
+        units = [FriendlyUnit("friendly", "a", 1, (0, 0), None, [])]
+        world = self.create_world(units)
+        self.assertEqual({"a": MoveType.REST}, world.plan_moves({units[0]: (0, 3)}, deadline=0))
+        self.assertEqual({"a": MoveType.MOVE}, world.plan_moves({units[0]: (0, 3)}))
+
+if __name__ == '__main__':
+    unittest.main()
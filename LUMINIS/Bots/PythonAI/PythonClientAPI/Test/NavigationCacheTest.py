@@ -0,0 +1,186 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from zipfile import ZipFile
+
+from PythonClientAPI.Game.Enums import Direction, Team, TileType
+from PythonClientAPI.Game.World import World
+from PythonClientAPI.Navigation import NavigationBuilder, NavigationFormat
+from PythonClientAPI.Navigation.NavigationCache import NavigationCache, navigation_cache, shared_memory
+
+
+def write_compiled_data(file, width, height):
+    data = bytearray([width, height, width, height, 2])
+    for x1 in range(width):
+        for y1 in range(height):
+            for x2 in range(width):
+                for y2 in range(height):
+                    data.append((x1 + y1 + x2 + y2) % 5)
+                    data.append((x1 * 7 + y1 * 5 + x2 * 3 + y2) % 256)
+    with ZipFile(file, 'w') as zip_file:
+        zip_file.writestr("data", bytes(data))
+
+
+class TestNavigationCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file = os.path.join(self.directory, "test_map.nac")
+        self.width, self.height = 4, 3
+        write_compiled_data(self.file, self.width, self.height)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_lookups(self, cache):
+        self.assertTrue(cache.loaded)
+        for position, target in [((0, 0), (0, 0)), ((3, 2), (1, 1)), ((2, 1), (3, 0))]:
+            x1, y1 = position
+            x2, y2 = target
+            self.assertEqual(Direction.INDEX_TO_DIRECTION[(x1 + y1 + x2 + y2) % 5], cache.get_next_direction_in_path(position, target))
+            self.assertEqual((x1 * 7 + y1 * 5 + x2 * 3 + y2) % 256, cache.get_distance(position, target))
+
+    def test_load_compiled_data(self):
+        cache = NavigationCache()
+        cache.load_compiled_data(self.file)
+        self.assert_lookups(cache)
+        cache.close()
+
+    def test_load_compiled_data_writes_v2_copy(self):
+        NavigationCache().load_compiled_data(self.file)
+        converted = NavigationFormat.converted_path(self.file)
+        self.assertTrue(os.path.isfile(converted))
+
+        cache = NavigationCache()
+        cache.load_navigation_data(converted)
+        self.assertIsNotNone(cache._mapped_file)
+        self.assertEqual((self.width, self.height), (cache.width, cache.height))
+        self.assert_lookups(cache)
+        cache.close()
+        self.assertFalse(cache.loaded)
+
+    def test_load_navigation_data_lazily(self):
+        converted = NavigationFormat.convert_compiled_data(self.file)
+        cache = NavigationCache()
+        cache.load_navigation_data(converted, lazy=True, max_rows=2)
+        self.assertEqual(0, cache.get_cached_row_count())
+        self.assert_lookups(cache)
+        self.assertEqual(2, cache.get_cached_row_count())
+        cache.close()
+        self.assertFalse(cache.loaded)
+
+    def test_distance_matrix(self):
+        converted = NavigationFormat.convert_compiled_data(self.file)
+        positions = [(0, 0), (3, 2), (2, 1)]
+        targets = [(1, 1), (3, 0), (0, 0), (1, 1)]
+        for lazy in (False, True):
+            cache = NavigationCache()
+            cache.load_navigation_data(converted, lazy=lazy)
+            expected = [[cache.get_distance(position, target) for target in targets] for position in positions]
+            self.assertEqual(expected, cache.get_distance_matrix(positions, targets))
+            self.assertEqual([[cache.get_distance((3, 2), (1, 1))]], cache.get_distance_matrix([(3, 2)], [(1, 1)]))
+            self.assertEqual([[], []], cache.get_distance_matrix(positions[:2], []))
+            cache.close()
+
+    def test_load_in_background(self):
+        cache = NavigationCache()
+        release = threading.Event()
+
+        def load(file):
+            release.wait()
+            cache.load_compiled_data(file)
+
+        cache.load_in_background(load, self.file)
+        self.assertTrue(cache.loading)
+        self.assertFalse(cache.wait_until_loaded(0.01))
+        release.set()
+        self.assertTrue(cache.wait_until_loaded(5))
+        self.assertFalse(cache.loading)
+        self.assert_lookups(cache)
+        cache.close()
+
+    def test_path_finding_falls_back_while_loading(self):
+        tiles = [[TileType.TILE for y in range(self.height)] for x in range(self.width)]
+        world = World(tiles, [], [], {Team.FRIENDLY: [], Team.ENEMY: []}, {Team.FRIENDLY: [], Team.ENEMY: []})
+        world.api._navigation_deadline = 0
+        release = threading.Event()
+        navigation_cache.load_in_background(release.wait)
+        try:
+            self.assertEqual(world.get_shortest_path((0, 0), (2, 0), None)[0], world.get_next_point_in_shortest_path((0, 0), (2, 0)))
+            self.assertEqual(2, world.get_shortest_path_distance((0, 0), (2, 0)))
+        finally:
+            release.set()
+        self.assertFalse(navigation_cache.wait_until_loaded(5))
+
+    @unittest.skipIf(shared_memory is None, "multiprocessing.shared_memory is not available")
+    def test_load_compiled_data_shared(self):
+        publisher = NavigationCache()
+        publisher.load_compiled_data(self.file, shared=True)
+        self.assertTrue(publisher.is_shared())
+
+        os.remove(NavigationFormat.converted_path(self.file))
+        subscriber = NavigationCache()
+        subscriber.load_compiled_data(self.file, shared=True)
+        self.assertTrue(subscriber.is_shared())
+        self.assertFalse(os.path.isfile(NavigationFormat.converted_path(self.file)))
+        self.assertEqual(publisher.map_hash, subscriber.map_hash)
+        self.assert_lookups(subscriber)
+
+        subscriber.close()
+        publisher.close()
+
+    def test_convert_compiled_data(self):
+        destination = os.path.join(self.directory, "converted.nac2")
+        self.assertEqual(destination, NavigationFormat.convert_compiled_data(self.file, destination))
+        with open(destination, 'rb') as f:
+            contents = f.read()
+        width, height, map_hash = NavigationFormat.read_header(contents)
+        self.assertEqual((self.width, self.height), (width, height))
+        plane_size = (width * height) ** 2
+        directions = contents[NavigationFormat.HEADER_SIZE:NavigationFormat.HEADER_SIZE + plane_size]
+        distances = contents[NavigationFormat.HEADER_SIZE + plane_size:]
+        self.assertEqual(NavigationFormat.compute_map_hash(directions, distances), map_hash)
+
+    def test_read_header_rejects_other_files(self):
+        self.assertRaises(ValueError, NavigationFormat.read_header, b'PK' + bytes(NavigationFormat.HEADER_SIZE))
+
+
+class TestNavigationBuilder(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.width, self.height = 7, 5
+        self.tiles = [[TileType.TILE for y in range(self.height)] for x in range(self.width)]
+        for y in range(self.height - 1):
+            self.tiles[3][y] = TileType.WALL
+        self.tiles[0][2] = TileType.WALL
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build_navigation_file(self):
+        file = os.path.join(self.directory, "built.nac2")
+        NavigationBuilder.build_navigation_file(self.tiles, file, processes=2)
+        cache = NavigationCache()
+        cache.load_navigation_data(file)
+        world = World(self.tiles, [], [], {Team.FRIENDLY: [], Team.ENEMY: []}, {Team.FRIENDLY: [], Team.ENEMY: []})
+
+        points = [(x, y) for x in range(self.width) for y in range(self.height)]
+        for start in points:
+            for end in points:
+                path = world.get_shortest_path(start, end, None)
+                if start == end or path is None:
+                    self.assertEqual(0, cache.get_distance(start, end))
+                    self.assertEqual(Direction.NOWHERE, cache.get_next_direction_in_path(start, end))
+                else:
+                    self.assertEqual(len(path), cache.get_distance(start, end))
+                    step = cache.get_next_direction_in_path(start, end)
+                    next_point = ((start[0] + step.value[0]) % self.width, (start[1] + step.value[1]) % self.height)
+                    self.assertEqual(len(path) - 1, cache.get_distance(next_point, end))
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
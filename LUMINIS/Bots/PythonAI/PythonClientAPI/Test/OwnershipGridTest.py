@@ -0,0 +1,85 @@
+from unittest import TestCase
+import random
+import unittest
+
+from PythonClientAPI.Game.Entities import Tile
+from PythonClientAPI.Game.Enums import TileType, Team
+from PythonClientAPI.Game.OwnershipGrid import OwnershipGrid
+from PythonClientAPI.Game.World import World
+
+
+class TestOwnershipGrid(TestCase):
+
+    def setUp(self):
+        self.generator = random.Random(12)
+        self.width, self.height = 13, 7
+        self.tiles = [[TileType.WALL if self.generator.random() < 0.15 else TileType.TILE for y in range(self.height)] for x in range(self.width)]
+        self.open_points = [(x, y) for x in range(self.width) for y in range(self.height) if self.tiles[x][y] != TileType.WALL]
+        owned = self.generator.sample(self.open_points, len(self.open_points) // 2)
+        self.team_to_tiles_map = {Team.FRIENDLY: [Tile(p, Team.FRIENDLY, self.generator.random() < 0.3) for p in owned[:20]],
+                                  Team.ENEMY: [Tile(p, Team.ENEMY, self.generator.random() < 0.3) for p in owned[20:]]}
+
+    def test_adjacent_mask_wraps_around_the_torus(self):
+        grid = OwnershipGrid(self.tiles)
+        for x, y in [(0, 0), (12, 6), (5, 0), (0, 3), (7, 6)]:
+            expected = {((x + dx) % self.width, (y + dy) % self.height) for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]}
+            actual = set(grid.get_points(grid.get_adjacent_mask(1 << grid.get_cell((x, y)))))
+            self.assertEqual(expected, actual)
+
+    def test_capturable_frontier_matches_tile_queries(self):
+        world = World(self.tiles, [], [], self.team_to_tiles_map, {Team.FRIENDLY: [], Team.ENEMY: []})
+        expected = [tile.position for tile in world.get_tiles()
+                    if not tile.is_friendly() and not tile.is_permanently_owned() and world.get_friendly_tiles_around(tile.position)]
+        self.assertEqual(sorted(expected), [tile.position for tile in world.get_capturable_frontier_tiles()])
+
+    def test_team_queries(self):
+        world = World(self.tiles, [], [], self.team_to_tiles_map, {Team.FRIENDLY: [], Team.ENEMY: []})
+        grid = world.get_ownership_grid()
+        for team in (Team.FRIENDLY, Team.ENEMY):
+            self.assertEqual(sorted(tile.position for tile in self.team_to_tiles_map[team]),
+                             grid.get_points(grid.get_team_mask(team)))
+            self.assertEqual(len(self.team_to_tiles_map[team]), grid.count(team))
+            for tile in self.team_to_tiles_map[team]:
+                self.assertEqual(team, grid.get_team(tile.position))
+                self.assertEqual(tile.is_permanently_owned(), grid.is_permanent(tile.position))
+        self.assertEqual(len(self.open_points) - len(self.team_to_tiles_map[Team.FRIENDLY]) - len(self.team_to_tiles_map[Team.ENEMY]),
+                         len(world.get_neutral_tiles()))
+        self.assertEqual(len(self.open_points), len(world.get_tiles()))
+
+    def test_tiles_are_created_on_access(self):
+        world = World(self.tiles, [], [], self.team_to_tiles_map, {Team.FRIENDLY: [], Team.ENEMY: []})
+        neutral_tiles = world.get_neutral_tiles()
+        created_tiles = lambda: sum(tile is not None for tile in world.api._cell_to_tile_cache)
+        self.assertEqual(0, created_tiles())
+
+        tile = neutral_tiles[3]
+        self.assertEqual(1, created_tiles())
+        self.assertTrue(tile.is_neutral())
+        self.assertIs(tile, world.get_tile_at(tile.position))
+        self.assertIn(tile, neutral_tiles)
+        self.assertNotIn(tile, world.get_friendly_tiles())
+        self.assertEqual(neutral_tiles.get_positions()[3:5], [t.position for t in neutral_tiles[3:5]])
+
+    def test_tiles_can_be_changed_like_a_list(self):
+        world = World(self.tiles, [], [], self.team_to_tiles_map, {Team.FRIENDLY: [], Team.ENEMY: []})
+        friendly_tiles = world.get_friendly_tiles()
+        self.assertIsInstance(friendly_tiles, list)
+
+        tiles = list(friendly_tiles)
+        friendly_tiles.sort(key=lambda tile: tile.position[1])
+        self.assertEqual(sorted(tiles, key=lambda tile: tile.position[1]), friendly_tiles)
+        removed = friendly_tiles.pop(0)
+        self.assertNotIn(removed, friendly_tiles)
+        friendly_tiles.append(removed)
+        self.assertIs(world.get_tile_at(removed.position), friendly_tiles[-1])
+        self.assertEqual([tile.position for tile in friendly_tiles], friendly_tiles.get_positions())
+
+    def test_load_returns_changed_cells(self):
+        grid = OwnershipGrid(self.tiles)
+        grid.load({Team.FRIENDLY: [(1, 2, 0), (3, 4, 1)]})
+        changed = grid.load({Team.FRIENDLY: [(1, 2, 1)], Team.ENEMY: [(5, 5, 0)]})
+        self.assertEqual(sorted(grid.get_cell(p) for p in [(1, 2), (3, 4), (5, 5)]), changed)
+        self.assertEqual([], grid.load({Team.FRIENDLY: [(1, 2, 1)], Team.ENEMY: [(5, 5, 0)]}))
+
+if __name__ == '__main__':
+    unittest.main()
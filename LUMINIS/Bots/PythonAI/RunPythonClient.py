@@ -7,8 +7,9 @@ import imp
 from PythonClientAPI.Communication.ClientHandlerProtocol import *
 import PythonClientAPI.Configurator.Constants as constants
 import PythonClientAPI.Communication.CommunicatorConstants as cc
+from PythonClientAPI.Communication.AIProcessExecutor import AIProcessExecutor
 from PythonClientAPI.Game.JSON import parse_config
-from PythonClientAPI.Navigation import NavigationCache
+from PythonClientAPI.Navigation import NavigationCache, NavigationFormat
 
 
 class Unbuffered(object):
@@ -23,6 +24,28 @@ class Unbuffered(object):
         return getattr(self.stream, attr)
 
 
+def load_navigation(map_cache_path, navigation_path, mode):
+    lazy = mode == "lazy"
+    cache = NavigationCache.navigation_cache
+    if map_cache_path is None:
+        cache.load_navigation_data(navigation_path, lazy=lazy)
+        return
+
+    if lazy:
+        try:
+            cache.load_navigation_data(NavigationFormat.convert_compiled_data(map_cache_path, navigation_path), lazy=True)
+            return
+        except OSError:
+            pass
+    cache.load_compiled_data(map_cache_path, shared=mode == "shared")
+
+
+def create_player_ai():
+    fp, pathname, description = imp.find_module('PlayerAI', [constants.PLAYER_AI_PATH])
+    player_ai_module = imp.load_module('PlayerAI', fp, pathname, description)
+    return player_ai_module.PlayerAI()
+
+
 if __name__ == '__main__':
     sys.stdout = Unbuffered(sys.stdout)
     sys.stderr = Unbuffered(sys.stderr)
@@ -43,6 +66,10 @@ if __name__ == '__main__':
             constants.LOCAL_PLAYER_UUID = sys.argv[i * 2 + 1]
         elif sys.argv[i * 2] == "-cp":
             constants.PLAYER_AI_PATH = sys.argv[i * 2 + 1]
+        elif sys.argv[i * 2] == "-n":
+            constants.NAVIGATION_MODE = sys.argv[i * 2 + 1]
+        elif sys.argv[i * 2] == "-x":
+            constants.AI_EXECUTOR = sys.argv[i * 2 + 1]
 
     if player_index == -1:
         if constants.LOCAL_PLAYER_UUID == "Red":
@@ -70,17 +97,26 @@ if __name__ == '__main__':
     except:
         pass
 
-    if map_cache_path == '' or not os.path.isfile(map_cache_path):
-        print("Could not find/load map navigation data. Path-finding may be very slow!", file=sys.stderr)
+    navigation_path = NavigationFormat.converted_path(map_cache_path)
+    navigation_args = None
+    if os.path.isfile(navigation_path) and not (os.path.isfile(map_cache_path) and os.path.getmtime(map_cache_path) > os.path.getmtime(navigation_path)):
+        navigation_args = (None, navigation_path, constants.NAVIGATION_MODE)
+    elif map_cache_path == '' or not os.path.isfile(map_cache_path):
+        print("Could not find/load map navigation data. Path-finding may be very slow! "
+              "Build it with: python -m PythonClientAPI.Navigation.NavigationBuilder", file=sys.stderr)
     else:
-        NavigationCache.navigation_cache.load_compiled_data(map_cache_path)
-    cache = NavigationCache.navigation_cache
+        navigation_args = (map_cache_path, navigation_path, constants.NAVIGATION_MODE)
     UUIDForAi = constants.LOCAL_PLAYER_UUID
     print("Welcome " + UUIDForAi)
-    fp, pathname, description = imp.find_module('PlayerAI', [constants.PLAYER_AI_PATH])
-    player_ai_module = imp.load_module('PlayerAI', fp, pathname, description)
-    client_ai = player_ai_module.PlayerAI()
-    client_handler_protocol = ClientHandlerProtocol(client_ai, cc.PORT_NUMBER, cc.MAXIMUM_ALLOWED_RESPONSE_TIME,
-                                                    UUIDForAi)
+    if constants.AI_EXECUTOR == "process":
+        # The navigation cache and the PlayerAI live in the worker process
+        executor = AIProcessExecutor(create_player_ai, load_navigation if navigation_args else None, navigation_args or ())
+        client_handler_protocol = ClientHandlerProtocol(None, cc.PORT_NUMBER, cc.MAXIMUM_ALLOWED_RESPONSE_TIME,
+                                                        UUIDForAi, executor)
+    else:
+        if navigation_args:
+            NavigationCache.navigation_cache.load_in_background(load_navigation, *navigation_args)
+        client_handler_protocol = ClientHandlerProtocol(create_player_ai(), cc.PORT_NUMBER, cc.MAXIMUM_ALLOWED_RESPONSE_TIME,
+                                                        UUIDForAi)
 
     client_handler_protocol.start_communications()